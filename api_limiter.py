@@ -1,16 +1,98 @@
 import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+
+# Lower values are served first when callers are queued
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
 
 class APILimiter:
-    def __init__(self, max_calls_per_minute=80):
-        self.max_calls = max_calls_per_minute
-        self.call_times = []
+    """
+    Sliding-window limiter over the last `window` seconds.
 
-    def allow(self):
-        now = time.time()
-        # Remove calls older than 60s
-        self.call_times = [t for t in self.call_times if now - t < 60]
+    Callers that find the budget used up can `await acquire()` and are
+    queued by priority until a slot frees up. When several API keys are
+    given the budget is per key, and `next_key()` hands keys out
+    round-robin so no single key goes over its own limit.
+    """
 
-        if len(self.call_times) < self.max_calls:
+    def __init__(self, max_calls_per_minute=80, keys=None, window=60, clock=time.monotonic):
+        self.keys = list(keys) if keys else [None]
+        self.max_calls = max_calls_per_minute * len(self.keys)
+        self.window = window
+        self.clock = clock
+        self.call_times = deque()
+        self._key_cycle = itertools.cycle(self.keys)
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._wakeup = None
+
+    def _expire(self, now):
+        # Calls are appended in time order, so only the left end can expire
+        while self.call_times and now - self.call_times[0] >= self.window:
+            self.call_times.popleft()
+
+    def _prune_waiters(self):
+        # Waiters that timed out or were cancelled are dropped lazily
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+    def allow(self):
+        now = self.clock()
+        self._expire(now)
+        self._prune_waiters()
+        # Don't jump ahead of callers that are already queued
+        if len(self.call_times) < self.max_calls and not self._waiters:
             self.call_times.append(now)
             return True
         return False
+
+    def remaining(self):
+        """Calls left in the current window."""
+        self._expire(self.clock())
+        return max(0, self.max_calls - len(self.call_times))
+
+    def next_key(self):
+        return next(self._key_cycle)
+
+    def pending(self):
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """
+        Wait for a call slot. Returns False if `timeout` seconds pass first.
+        """
+        if self.allow():
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule_release()
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _schedule_release(self):
+        if self._wakeup is not None or not self._waiters:
+            return
+        if len(self.call_times) < self.max_calls:
+            delay = 0
+        else:
+            delay = max(0, self.call_times[0] + self.window - self.clock())
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self):
+        self._wakeup = None
+        now = self.clock()
+        self._expire(now)
+        while self._waiters and len(self.call_times) < self.max_calls:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.call_times.append(now)
+            future.set_result(True)
+        self._schedule_release()
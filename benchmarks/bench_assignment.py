@@ -0,0 +1,59 @@
+"""
+Benchmark for oc_matching.assign_slots against the greedy loop that
+/oc_assignments used before.
+
+    python -m benchmarks.bench_assignment
+"""
+import time
+from oc_matching import assign_slots, slot_weight
+from eligibility import EligibilityIndex
+from benchmarks.fixtures import FactionFixture
+
+
+def make_faction(members, crimes, seed=1):
+    """EligibilityIndex and open slots for a synthetic faction."""
+    fixture = FactionFixture(members, crimes, seed)
+    index = EligibilityIndex(*fixture.eligibility_rows())
+    return index, index.open_slots(fixture.torn_crimes()["crimes"])
+
+
+def greedy(slots, available_ids, index):
+    available = list(available_ids)
+    out = []
+    for slot in sorted(slots, key=lambda s: (-s.required_cpr, -s.level)):
+        for m_id in available:
+            cpr = index.cpr(m_id, slot.crime_name, slot.position)
+            if cpr and cpr >= slot.required_cpr:
+                out.append((slot, m_id, cpr))
+                available.remove(m_id)
+                break
+    return out
+
+
+def weight(assignments):
+    return sum(slot_weight(slot, cpr) for slot, _, cpr in assignments)
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    print(f"{'members':>8} {'crimes':>7} {'slots':>6} | {'greedy filled':>13} {'weight':>7} {'ms':>7} "
+          f"| {'matching filled':>15} {'weight':>7} {'ms':>7}")
+    for members, crimes in [(30, 10), (100, 30), (100, 60), (250, 100)]:
+        index, slots = make_faction(members, crimes)
+        available = set(index.by_member)
+        g, g_ms = timed(lambda: greedy(slots, available, index))
+        m, m_ms = timed(lambda: assign_slots(slots, available, index.role_index()))
+        print(f"{members:>8} {crimes:>7} {len(slots):>6} | {len(g):>13} {weight(g):>7} {g_ms:>7.2f} "
+              f"| {len(m):>15} {weight(m):>7} {m_ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Timing and peak memory of the bot's hot paths on synthetic factions of
+100 to 10k members, with Google Sheets replaced by fake_gspread. Data is
+seeded, so runs on the same machine are comparable.
+
+    python -m benchmarks.bench_hot_paths [--sizes 100,1000,10000] [--repeat 5]
+"""
+import argparse
+import cpr_sync
+from api_limiter import APILimiter
+from eligibility import EligibilityIndex
+from fake_gspread import FakeClient
+from ledger import parse_transfers
+from models import parse_members
+from oc_assignment import cpr_matrix, suggest_oc_batch
+from oc_matching import assign_slots
+from sheet_sync import SheetSync, SnapshotStore
+from benchmarks.fixtures import FactionFixture, SHEET_KEY, CPR_SHEET_NAME, DELINQUENTS_SHEET
+from benchmarks.report import measure, print_table
+
+# Crimes scale more slowly than members in a real faction
+CRIMES_FOR_MEMBERS = {100: 20, 1_000: 40, 10_000: 60}
+
+
+def bench_size(members, repeat):
+    fixture = FactionFixture(members, CRIMES_FOR_MEMBERS.get(members, max(10, members // 100)))
+    spreadsheets = fixture.spreadsheets(delinquent_rows=members)
+    cpr_rows, crime_rows = fixture.eligibility_rows()
+    client = FakeClient(spreadsheets)
+    sheets = SheetSync(store=SnapshotStore(":memory:"), client=client)
+    # load_cpr_data reads through the module-level SheetSync
+    cpr_sync.sync = sheets
+
+    results = []
+
+    def run(name, fn):
+        result, stats = measure(fn, repeat)
+        results.append(dict(path=name, members=members, **stats))
+        return result
+
+    def download():
+        # A changed sheet: revision check, download, snapshot write
+        client.sheets[SHEET_KEY].touch()
+        return sheets.get_values(SHEET_KEY, CPR_SHEET_NAME, max_age=0)
+
+    run("sheet download", download)
+    cpr_data = run("load_cpr_data", lambda: cpr_sync.load_cpr_data(SHEET_KEY, CPR_SHEET_NAME))
+    table = run("load_cpr_table", lambda: cpr_sync.load_cpr_table(SHEET_KEY, CPR_SHEET_NAME))
+
+    index = run("eligibility index", lambda: EligibilityIndex(cpr_rows, crime_rows))
+    slots = index.open_slots(fixture.torn_crimes()["crimes"])
+    available = set(index.by_member)
+    role_index = index.role_index()
+    run("assign_slots", lambda: assign_slots(slots, available, role_index))
+
+    ids, matrix = run("cpr_matrix", lambda: cpr_matrix(cpr_data))
+    run("suggest_oc_batch", lambda: suggest_oc_batch(matrix, members // 2))
+    faction_data = fixture.torn_faction()
+    run("parse_members", lambda: parse_members(faction_data["members"]))
+    run("CPRTable.matrix", lambda: table.matrix(table.ids))
+
+    records = sheets.get_values(SHEET_KEY, DELINQUENTS_SHEET)[1:]
+    run("parse_transfers", lambda: parse_transfers(records))
+
+    limiter = APILimiter(max_calls_per_minute=members)
+    run("limiter.allow x1000", lambda: [limiter.allow() for _ in range(1000)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated member counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for members in (int(s) for s in args.sizes.split(",")):
+        rows.extend(bench_size(members, args.repeat))
+    rows.sort(key=lambda r: (r["path"], r["members"]))
+    print_table(rows, [
+        ("path", "path", ""),
+        ("members", "members", ""),
+        ("best_ms", "best ms", ".2f"),
+        ("median_ms", "median ms", ".2f"),
+        ("peak_kib", "peak KiB", ",.0f"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
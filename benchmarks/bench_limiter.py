@@ -0,0 +1,81 @@
+"""
+Benchmark for api_limiter.APILimiter.
+
+Queues thousands of mixed-priority callers against a shortened window and
+reports bookkeeping cost, throughput and how long each priority waited.
+
+    python -m benchmarks.bench_limiter
+"""
+import time
+import random
+import asyncio
+import statistics
+from api_limiter import APILimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+
+class ListLimiter:
+    """The previous implementation, kept here for comparison."""
+
+    def __init__(self, max_calls_per_minute=80):
+        self.max_calls = max_calls_per_minute
+        self.call_times = []
+
+    def allow(self):
+        now = time.time()
+        self.call_times = [t for t in self.call_times if now - t < 60]
+        if len(self.call_times) < self.max_calls:
+            self.call_times.append(now)
+            return True
+        return False
+
+
+def bench_allow(limiter, calls=200_000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        limiter.allow()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def bench_queue(callers, max_calls, window, keys):
+    limiter = APILimiter(max_calls_per_minute=max_calls, keys=keys, window=window)
+    waits = {PRIORITY_INTERACTIVE: [], PRIORITY_BACKGROUND: []}
+    used = {k: 0 for k in limiter.keys}
+
+    async def caller(priority):
+        start = time.perf_counter()
+        await limiter.acquire(priority)
+        waits[priority].append(time.perf_counter() - start)
+        used[limiter.next_key()] += 1
+
+    rng = random.Random(1)
+    priorities = [PRIORITY_INTERACTIVE if rng.random() < 0.2 else PRIORITY_BACKGROUND for _ in range(callers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(p) for p in priorities))
+    elapsed = time.perf_counter() - start
+
+    print(f"  {callers} callers, {max_calls}/window x {len(limiter.keys)} key(s), window={window}s")
+    print(f"  drained in {elapsed:.2f}s ({callers / elapsed:,.0f} grants/s, ideal {limiter.max_calls / window:,.0f}/s)")
+    for priority, name in ((PRIORITY_INTERACTIVE, "interactive"), (PRIORITY_BACKGROUND, "background")):
+        w = waits[priority]
+        print(f"  {name:<12} n={len(w):<5} mean={statistics.mean(w) * 1000:7.1f}ms "
+              f"p50={percentile(w, 50) * 1000:7.1f}ms p99={percentile(w, 99) * 1000:7.1f}ms")
+    print(f"  calls per key: {used}")
+
+
+def main():
+    print("allow() cost with a full window:")
+    print(f"  list rebuild : {bench_allow(ListLimiter(), 20_000):6.2f} µs/call")
+    print(f"  deque window : {bench_allow(APILimiter()):6.2f} µs/call")
+
+    print("\nQueued acquire():")
+    asyncio.run(bench_queue(5000, 80, 0.05, None))
+    asyncio.run(bench_queue(5000, 80, 0.05, ["key-a", "key-b", "key-c"]))
+
+
+if __name__ == "__main__":
+    main()
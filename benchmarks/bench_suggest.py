@@ -0,0 +1,52 @@
+"""
+Benchmark for oc_assignment.suggest_oc_batch against calling suggest_oc
+once per member, as monitor_ocs used to.
+
+    python -m benchmarks.bench_suggest
+"""
+import time
+import random
+import numpy as np
+from oc_assignment import CPR_FIELDS, cpr_matrix, suggest_oc, suggest_oc_batch
+
+
+def make_cpr_data(members, seed=1):
+    rng = random.Random(seed)
+    cpr_data = {}
+    for m in range(members):
+        row = {"Player ID": 1000 + m, "Player Name": f"Player{m}"}
+        for field in CPR_FIELDS:
+            # Roughly a fifth of the cells are blank on a real sheet
+            row[field] = rng.randint(40, 95) if rng.random() > 0.2 else ""
+        cpr_data[str(1000 + m)] = row
+    return cpr_data
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    print(f"{'members':>8} | {'per member ms':>13} | {'matrix ms':>9} {'batch ms':>8} | {'same levels':>11} {'budgeted cost':>13}")
+    for members in (100, 1_000, 10_000):
+        cpr_data = make_cpr_data(members)
+        unlimited = members * 4
+
+        single, single_ms = timed(lambda: [suggest_oc(row, unlimited)[0] or 0 for row in cpr_data.values()])
+        (_, matrix), matrix_ms = timed(lambda: cpr_matrix(cpr_data))
+        (levels, _), batch_ms = timed(lambda: suggest_oc_batch(matrix, unlimited))
+
+        scope = members // 2
+        _, costs = suggest_oc_batch(matrix, scope)
+        same = np.array_equal(np.array(single), levels)
+        print(f"{members:>8} | {single_ms:>13.2f} | {matrix_ms:>9.2f} {batch_ms:>8.2f} | "
+              f"{str(same):>11} {int(costs.sum()):>6}/{scope:<6}")
+
+
+if __name__ == "__main__":
+    main()
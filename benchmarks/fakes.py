@@ -0,0 +1,154 @@
+"""
+Offline stand-ins for the services the bot talks to, for benchmarks and
+load tests: a local HTTP server that answers like the Torn API, and
+just enough of discord.py's Interaction/Channel/User to run slash
+command callbacks. For Google Sheets use fake_gspread.FakeClient.
+"""
+import time
+import asyncio
+import itertools
+from aiohttp import web
+
+
+class FakeTorn:
+    """
+    Serves fixture.torn_response() on 127.0.0.1 with a fixed added
+    latency, counting requests per selection set.
+
+        async with FakeTorn(fixture, latency=0.05) as torn:
+            client = TornClient(limiter, base_url=torn.url)
+    """
+
+    def __init__(self, fixture, latency=0.05, port=0):
+        self.fixture = fixture
+        self.latency = latency
+        self.port = port
+        self.requests = {}
+        self._runner = None
+        self.url = None
+
+    async def _handle(self, request):
+        selections = request.query.get("selections", "")
+        self.requests[selections] = self.requests.get(selections, 0) + 1
+        await asyncio.sleep(self.latency)
+        return web.json_response(self.fixture.torn_response(request.path, selections))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+class FakeMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, channel, content=None, embed=None, view=None):
+        self.id = next(self._ids)
+        self.channel = channel
+        self.content = content
+        self.embeds = [embed] if embed is not None else []
+        self.view = view
+
+
+class FakeChannel:
+    """Text channel or DM target; send() takes `latency` seconds like a Discord round trip."""
+
+    def __init__(self, channel_id=1, name="bench", latency=0.05):
+        self.id = channel_id
+        self.name = name
+        self.latency = latency
+        self.sent = []
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = FakeMessage(self, content, embed, view)
+        self.sent.append(message)
+        return message
+
+
+class FakeUser(FakeChannel):
+    def __init__(self, user_id, display_name, latency=0.05):
+        super().__init__(user_id, display_name, latency)
+        self.display_name = display_name
+        self.mention = f"<@{user_id}>"
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, content=None, **kwargs):
+        if self._done:
+            raise RuntimeError("Interaction has already been responded to")
+        await asyncio.sleep(self._interaction.latency)
+        self._done = True
+        self._interaction.responded_at = time.perf_counter()
+        self._interaction.messages.append(content)
+
+    async def send_message(self, content=None, **kwargs):
+        await self._respond(content, **kwargs)
+
+    async def defer(self, **kwargs):
+        await self._respond(None)
+
+    async def edit_message(self, content=None, **kwargs):
+        await self._respond(content, **kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(self._interaction.latency)
+        self._interaction.messages.append(content)
+
+
+class FakeInteraction:
+    """
+    One slash command invocation. responded_at records when the first
+    response (message or defer) went out, i.e. what Discord's 3 second
+    deadline applies to.
+    """
+
+    def __init__(self, user, channel, guild=None, latency=0.05):
+        self.user = user
+        self.channel = channel
+        self.guild = guild
+        self.latency = latency
+        self.created_at = time.perf_counter()
+        self.responded_at = None
+        self.messages = []
+        self.extras = {}
+        self.client = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def delete_original_response(self):
+        await asyncio.sleep(self.latency)
+
+
+class FakeGuild:
+    def __init__(self, guild_id, members=()):
+        self.id = guild_id
+        self.members = list(members)
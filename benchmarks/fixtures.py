@@ -0,0 +1,183 @@
+"""
+Synthetic, seeded faction data for the benchmarks: the bot's Google
+sheets and the Torn API responses, all describing the same members and
+crimes so the sheet and Torn views of a faction line up.
+
+    faction = FactionFixture(members=1000, crimes=50)
+    client = FakeClient(faction.spreadsheets())
+"""
+import random
+import time
+from oc_assignment import CPR_FIELDS
+from eligibility import CPR_SHEET, CRIME_SHEET
+
+ROLES = ["Robber", "Hacker", "Driver", "Lookout", "Muscle", "Thief"]
+SHEET_KEY = "bench-sheet"
+CPR_SHEET_NAME = "CPR"
+DELINQUENTS_SHEET = "Delinquents"
+FIRST_ID = 1000
+
+
+class FactionFixture:
+    def __init__(self, members, crimes, seed=1, now=None):
+        self.seed = seed
+        rng = random.Random(seed)
+        self.now = int(time.time() if now is None else now)
+        self.member_ids = [FIRST_ID + m for m in range(members)]
+        self.names = {pid: f"Player{pid - FIRST_ID}" for pid in self.member_ids}
+        self.crime_names = [f"Crime {i}" for i in range(crimes)]
+        self.crime_roles = {c: rng.sample(ROLES, 4) for c in self.crime_names}
+        self.crime_level = {c: rng.randint(1, 8) for c in self.crime_names}
+        self.required_cpr = {
+            (c, role): rng.choice([55, 60, 65, 70, 75, 80])
+            for c in self.crime_names for role in self.crime_roles[c]
+        }
+
+        # Each member has a CPR in one role per crime
+        self.cpr = {}
+        for pid in self.member_ids:
+            for c in self.crime_names:
+                self.cpr[(pid, c, rng.choice(self.crime_roles[c]))] = rng.randint(30, 90)
+
+        # Roughly 60% of slots are open; the rest hold a member, each in at most one crime
+        idle = list(self.member_ids)
+        rng.shuffle(idle)
+        self.slot_users = {}
+        for c in self.crime_names:
+            for role in self.crime_roles[c]:
+                if rng.random() >= 0.6 and idle:
+                    self.slot_users[(c, role)] = idle.pop()
+        self.ready_at = {c: self.now + rng.randint(-3600, 48 * 3600) for c in self.crime_names}
+        self.last_action = {pid: self.now - int(rng.expovariate(1 / 7200)) for pid in self.member_ids}
+
+    def _rng(self, name):
+        # Each generated table gets its own stream, so they don't depend on call order
+        return random.Random(f"{self.seed}:{name}")
+
+    # Google sheets
+
+    def eligibility_rows(self):
+        """(Member_CPR rows, Crime&Position rows) as eligibility.EligibilityIndex reads them."""
+        crime_rows = []
+        for c in self.crime_names:
+            for role in self.crime_roles[c]:
+                row = [""] * 19
+                row[12], row[13], row[14] = c, str(self.crime_level[c]), role
+                row[18] = str(self.required_cpr[(c, role)])
+                crime_rows.append(row)
+
+        headers, levels, roles = ["Name", "ID", ""], ["", "", ""], ["", "", ""]
+        for c in self.crime_names:
+            for role in self.crime_roles[c]:
+                headers.append(c)
+                levels.append(str(self.crime_level[c]))
+                roles.append(role)
+        cpr_rows = [headers, levels, roles]
+        for pid in self.member_ids:
+            row = [self.names[pid], str(pid), ""]
+            for c in self.crime_names:
+                row += [str(self.cpr.get((pid, c, role), "")) for role in self.crime_roles[c]]
+            cpr_rows.append(row)
+        return cpr_rows, crime_rows
+
+    def cpr_sheet(self):
+        """The per-role CPR sheet cpr_sync.load_cpr_data reads."""
+        rng = self._rng("cpr")
+        rows = [["Player ID", "Player Name"] + CPR_FIELDS]
+        for pid in self.member_ids:
+            # Roughly a fifth of the cells are blank on a real sheet
+            rows.append([str(pid), self.names[pid]] + [
+                str(rng.randint(40, 95)) if rng.random() > 0.2 else "" for _ in CPR_FIELDS
+            ])
+        return rows
+
+    def delinquents(self, rows):
+        """Delinquents sheet with `rows` transfers, about a third already completed."""
+        rng = self._rng("delinquents")
+        sheet = [[f"Col {i}" for i in range(32)]]
+        for _ in range(rows):
+            row = [""] * 32
+            if rng.random() < 0.33:
+                row[24] = "Yes"
+            row[28] = f"${rng.randint(1, 50) * 1_000_000:,}"
+            row[29] = str(rng.choice(self.member_ids))
+            row[30] = f"${rng.randint(1, 20) * 1_000_000:,}"
+            row[31] = " ".join(str(pid) for pid in rng.sample(self.member_ids, min(3, len(self.member_ids))))
+            sheet.append(row)
+        return sheet
+
+    def spreadsheets(self, delinquent_rows=200):
+        """{sheet key: {worksheet: rows}} for fake_gspread.FakeClient."""
+        cpr_rows, crime_rows = self.eligibility_rows()
+        return {SHEET_KEY: {
+            CPR_SHEET: cpr_rows,
+            CRIME_SHEET: crime_rows,
+            CPR_SHEET_NAME: self.cpr_sheet(),
+            DELINQUENTS_SHEET: self.delinquents(delinquent_rows),
+        }}
+
+    # Torn API responses
+
+    def _crimes(self):
+        crimes = []
+        for i, c in enumerate(self.crime_names):
+            slots = []
+            for role in self.crime_roles[c]:
+                user = self.slot_users.get((c, role))
+                slots.append({
+                    "position": role,
+                    "user": {"id": user, "joined_at": self.now - 3600} if user else None,
+                    "checkpoint_pass_rate": self.required_cpr[(c, role)],
+                })
+            crimes.append({"id": i + 1, "name": c, "difficulty": self.crime_level[c],
+                           "status": "Planning", "ready_at": self.ready_at[c], "slots": slots})
+        return crimes
+
+    def _in_oc(self):
+        return set(self.slot_users.values())
+
+    def torn_faction(self, scope=40):
+        """/faction/?selections=basic,crimes,members, in the shape monitor_ocs reads."""
+        in_oc = self._in_oc()
+        members = {
+            str(pid): {
+                "name": self.names[pid],
+                "criminal_mission": {"id": 1} if pid in in_oc else None,
+                "last_action": {"timestamp": self.last_action[pid]},
+                "status": {"state": "Okay"},
+            }
+            for pid in self.member_ids
+        }
+        return {"name": "Bench Faction", "members": members, "crimes": {"scope": scope}}
+
+    def torn_crimes(self):
+        """/faction/?selections=crimes,members&cat=available, as /oc_assignments reads it."""
+        in_oc = self._in_oc()
+        members = [
+            {"id": pid, "name": self.names[pid], "is_in_oc": pid in in_oc,
+             "last_action": {"timestamp": self.last_action[pid]}, "status": {"state": "Okay"}}
+            for pid in self.member_ids
+        ]
+        return {"crimes": self._crimes(), "members": members}
+
+    def torn_balances(self):
+        rng = self._rng("balances")
+        return {"balance": {"members": [
+            {"id": pid, "username": self.names[pid],
+             "money": rng.randint(0, 500) * 100_000, "points": rng.randint(0, 5000)}
+            for pid in self.member_ids
+        ]}}
+
+    def torn_response(self, path, selections):
+        """What the fake Torn server answers for a request."""
+        selections = set(selections.split(","))
+        if path.startswith("/user/"):
+            pid = int(path.strip("/").split("/")[-1])
+            profile = {"id": pid, "name": self.names.get(pid, ""),
+                       "last_action": {"timestamp": self.last_action.get(pid, 0)}, "status": {"state": "Okay"}}
+            return {"profile": profile, "crimes": {}}
+        if "balance" in selections:
+            return self.torn_balances()
+        if "basic" in selections:
+            return self.torn_faction()
+        return self.torn_crimes()
@@ -0,0 +1,140 @@
+"""
+Load test: fires hundreds of concurrent slash command invocations at
+the bot's command callbacks. Torn is a local fake server and Sheets and
+Discord are in-memory fakes. Reports time to first response (the part
+Discord's 3 second deadline applies to) and time to completion per
+command.
+
+    python -m benchmarks.load_test [--concurrency 300] [--commands status,balance,oc_assignments]
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+
+# bot.py reads these at import; nothing is sent to Discord or Torn
+os.environ.setdefault("DISCORD_BOT_TOKEN", "load-test")
+os.environ.setdefault("TORN_API_KEY", "load-test")
+
+import bot
+import cpr_sync
+import executor
+from fake_gspread import FakeClient
+from faction_history import FactionHistory
+from ledger import LedgerProcessor
+from sheet_sync import SheetSync, SnapshotStore
+from benchmarks.fixtures import FactionFixture, SHEET_KEY, CPR_SHEET_NAME
+from benchmarks.fakes import FakeTorn, FakeChannel, FakeUser, FakeGuild, FakeInteraction
+from benchmarks.report import latency_stats, print_table
+
+# Discord drops interactions that get no response within this many seconds
+RESPONSE_DEADLINE = 3.0
+
+COMMAND_ARGS = {
+    "status": {},
+    "balance": {},
+    "balance_request": {"amount": 1},
+    "oc_assignments": {},
+    "delinquents": {},
+    "forecast": {"hours": 6},
+}
+
+
+def configure(fixture, torn_url, discord_latency):
+    """Point the bot's first faction and the sheet layer at the fakes."""
+    sheets = SheetSync(store=SnapshotStore(":memory:"), client=FakeClient(fixture.spreadsheets()))
+    bot.sheets = sheets
+    cpr_sync.sync = sheets
+
+    faction = next(iter(bot.factions))
+    faction.torn.base_url = torn_url
+    faction.oc_sheet_key = SHEET_KEY
+    faction.cpr_sheet_key = SHEET_KEY
+    faction.cpr_sheet_name = CPR_SHEET_NAME
+    faction.history = FactionHistory(":memory:")
+    faction.ledger = LedgerProcessor(sheets, SHEET_KEY, path=None)
+    guild = FakeGuild(faction.guild_id) if faction.guild_id is not None else None
+    return faction, guild, FakeChannel(latency=discord_latency)
+
+
+async def invoke(name, interaction):
+    callback = bot.tree.get_command(name).callback
+    interaction.created_at = time.perf_counter()
+    await callback(interaction, **COMMAND_ARGS[name])
+    return time.perf_counter()
+
+
+async def run_load(args):
+    fixture = FactionFixture(args.members, args.crimes)
+    commands = args.commands.split(",")
+    rng = random.Random(1)
+    async with FakeTorn(fixture, latency=args.torn_latency) as torn:
+        faction, guild, channel = configure(fixture, torn.url, args.discord_latency)
+        interactions = []
+        for _ in range(args.concurrency):
+            pid = rng.choice(fixture.member_ids)
+            user = FakeUser(pid, f"{fixture.names[pid]} [{pid}]", args.discord_latency)
+            interactions.append((rng.choice(commands), FakeInteraction(user, channel, guild, args.discord_latency)))
+
+        start = time.perf_counter()
+        finished = await asyncio.gather(*(invoke(name, i) for name, i in interactions), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        await faction.torn.close()
+
+    rows = []
+    for name in commands:
+        runs = [(i, end) for (n, i), end in zip(interactions, finished) if n == name]
+        if not runs:
+            continue
+        failed = [end for _, end in runs if isinstance(end, BaseException)]
+        done = [(i, end) for i, end in runs if not isinstance(end, BaseException)]
+        first = [i.responded_at - i.created_at for i, _ in done if i.responded_at is not None]
+        total = [end - i.created_at for i, end in done]
+        # Commands catch their own exceptions and answer "Error ..."
+        errors = sum(1 for i, _ in done if any(str(m).startswith("Error") for m in i.messages if m))
+        row = {"command": name, "calls": len(runs), "failed": len(failed) + errors,
+               "late": sum(1 for s in first if s > RESPONSE_DEADLINE)}
+        for prefix, values in (("first", first), ("total", total)):
+            for key, value in latency_stats(values or [0.0]).items():
+                row[f"{prefix}_{key}"] = value
+        rows.append(row)
+        for error in failed[:3]:
+            print(f"⚠️ /{name} raised {error!r}")
+
+    print(f"{args.concurrency} invocations in {elapsed:.2f}s "
+          f"({args.concurrency / elapsed:,.0f}/s), Torn requests: {torn.requests}")
+    print_table(rows, [
+        ("command", "command", ""),
+        ("calls", "calls", ""),
+        ("failed", "failed", ""),
+        ("late", f">{RESPONSE_DEADLINE:.0f}s", ""),
+        ("first_p50_ms", "1st p50 ms", ".1f"),
+        ("first_p99_ms", "1st p99 ms", ".1f"),
+        ("total_p50_ms", "p50 ms", ".1f"),
+        ("total_p95_ms", "p95 ms", ".1f"),
+        ("total_p99_ms", "p99 ms", ".1f"),
+        ("total_max_ms", "max ms", ".1f"),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=300, help="invocations fired at once")
+    parser.add_argument("--commands", default="status,balance,balance_request,oc_assignments",
+                        help=f"comma-separated, from {','.join(COMMAND_ARGS)}")
+    parser.add_argument("--members", type=int, default=100)
+    parser.add_argument("--crimes", type=int, default=20)
+    parser.add_argument("--torn-latency", type=float, default=0.1, help="seconds per fake Torn request")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per fake Discord call")
+    args = parser.parse_args()
+
+    executor.start()
+    try:
+        asyncio.run(run_load(args))
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Regression checks for bugs found in review, run offline against the
+fakes (fake_gspread, benchmarks.fixtures, fake clocks). Each check
+raises AssertionError when the bug is back.
+
+    python -m benchmarks.regressions [check ...]
+
+Exits with status 1 if any check fails.
+"""
+import os
+import sys
+import asyncio
+import inspect
+import tempfile
+import traceback
+
+# bot.py and torn_api read these at import; nothing is sent to Discord or Torn
+os.environ.setdefault("DISCORD_BOT_TOKEN", "regressions")
+os.environ.setdefault("TORN_API_KEY", "regressions")
+
+from fake_gspread import FakeClient
+from sheet_sync import SheetSync, SnapshotStore
+from ledger import LedgerProcessor, DELINQUENTS_SHEET, LEDGER_WIDTH
+from notifier import ChangeNotifier
+from torn_api import ResponseCache
+from models import Member
+from forecast import Timeline
+from scheduler import AdaptiveScheduler, READY_GRACE
+from benchmarks.fixtures import FactionFixture
+from benchmarks.fakes import FakeTorn, FakeUser, FakeGuild, FakeInteraction
+
+CHECKS = {}
+
+
+def check(fn):
+    CHECKS[fn.__name__] = fn
+    return fn
+
+
+def ledger_row(from_amount="", from_id="", to_amount="", to_ids="", completed=""):
+    row = ["x"] + [""] * (LEDGER_WIDTH - 1)
+    row[24] = completed
+    row[28:32] = [from_amount, from_id, to_amount, to_ids]
+    return row
+
+
+def ledger_sheet(rows):
+    client = FakeClient({"ledger": {DELINQUENTS_SHEET: [["header"] * LEDGER_WIDTH] + rows}})
+    sheets = SheetSync(store=SnapshotStore(":memory:"), client=client)
+    return sheets, client.open_by_key("ledger").worksheet(DELINQUENTS_SHEET)
+
+
+def outstanding_rows(ledger):
+    return sorted({t["row"] + 2 for t in ledger.update()})
+
+
+@check
+def ledger_sees_rows_filled_in_above_the_cursor():
+    sheets, worksheet = ledger_sheet([
+        ledger_row("$100", "1", "$50", "2"),
+        ledger_row(),                                  # sheet row 3, amounts not in yet
+        ledger_row("$10", "4", "$5", "5"),
+    ])
+    ledger = LedgerProcessor(sheets, "ledger", path=None, chunk_rows=2)
+    assert outstanding_rows(ledger) == [2, 4]
+
+    worksheet.update("AC3:AF3", [["$30", "6", "$15", "7"]])
+    assert outstanding_rows(ledger) == [2, 3, 4]
+    assert outstanding_rows(LedgerProcessor(sheets, "ledger", path=None)) == [2, 3, 4]
+
+
+@check
+def ledger_sees_reopened_rows():
+    sheets, worksheet = ledger_sheet([
+        ledger_row("$100", "1", "$50", "2", completed="Yes"),
+        ledger_row("$10", "4", "$5", "5"),
+    ])
+    ledger = LedgerProcessor(sheets, "ledger", path=None)
+    assert outstanding_rows(ledger) == [3]
+
+    worksheet.update("Y2", [[""]])
+    assert outstanding_rows(ledger) == [2, 3]
+    worksheet.update("Y3", [["Yes"]])
+    assert outstanding_rows(ledger) == [2]
+
+
+async def monitor_cycle(fixture, guild=None):
+    """
+    (faction, what bot.run_monitor_cycle returned) for one poll of a fake
+    Torn serving fixture, with guild as the faction's Discord server.
+    """
+    # Imported here so the sheet-only checks run without discord.py's startup cost
+    import bot
+    from benchmarks.load_test import configure
+
+    async with FakeTorn(fixture, latency=0) as torn:
+        faction, _, _ = configure(fixture, torn.url, 0)
+        # The bot's factions outlive one check; start each from a cold cache
+        faction.torn.cache = ResponseCache()
+        faction.notifier = ChangeNotifier(os.path.join(tempfile.mkdtemp(), "monitor_state.json"))
+        bot.guild_of = lambda _: guild
+        try:
+            return faction, await bot.run_monitor_cycle(faction)
+        finally:
+            await faction.torn.close()
+
+
+@check
+async def scheduler_polls_when_the_next_oc_is_ready():
+    fixture = FactionFixture(50, 5)
+    # Nobody active lately and one OC ready in two minutes, the rest a day out
+    fixture.last_action = dict.fromkeys(fixture.member_ids, fixture.now - 86400)
+    fixture.ready_at = dict.fromkeys(fixture.crime_names, fixture.now + 86400)
+    fixture.ready_at[fixture.crime_names[0]] = fixture.now + 120
+
+    scheduler = AdaptiveScheduler(clock=lambda: fixture.now)
+    _, crimes_data = await monitor_cycle(fixture)
+    delay = scheduler.next_delay(crimes_data)
+    assert delay == 120 + READY_GRACE, delay
+
+
+@check
+async def history_records_oc_slots():
+    fixture = FactionFixture(50, 5)
+    faction, _ = await monitor_cycle(fixture)
+    slots = faction.history.slots_at()
+    expected = [
+        (i + 1, c, role, fixture.slot_users.get((c, role)), fixture.ready_at[c])
+        for i, c in enumerate(fixture.crime_names) for role in fixture.crime_roles[c]
+    ]
+    assert sorted(slots, key=repr) == sorted(expected, key=repr), slots
+
+
+@check
+async def monitor_dms_members_by_torn_id():
+    fixture = FactionFixture(50, 5)
+    # Discord usernames have nothing to do with the sheet's names; display names carry the Torn ID
+    users = []
+    for pid in fixture.member_ids:
+        user = FakeUser(pid, f"{fixture.names[pid]} [{pid}]", 0)
+        user.name = f"handle{pid}"
+        users.append(user)
+    await monitor_cycle(fixture, FakeGuild(1, users))
+    assert any(user.sent for user in users), "no eligibility DMs were sent"
+    for user in users:
+        for message in user.sent:
+            assert f"Hey {fixture.names[user.id]}!" in message.content, (user.display_name, message.content)
+
+
+@check
+async def torn_commands_answer_within_discords_window():
+    # Imported here so the sheet-only checks run without discord.py's startup cost
+    import bot
+    from benchmarks.load_test import configure, invoke
+
+    fixture = FactionFixture(50, 5)
+    pid = fixture.member_ids[0]
+    # Slower than the 3s Discord allows, but well within the request timeout
+    async with FakeTorn(fixture, latency=3.5) as torn:
+        faction, guild, channel = configure(fixture, torn.url, 0)
+        faction.torn.cache = ResponseCache()
+        user = FakeUser(pid, f"{fixture.names[pid]} [{pid}]", 0)
+        interactions = {name: FakeInteraction(user, channel, guild, 0)
+                        for name in ("status", "balance", "balance_request")}
+        try:
+            await asyncio.gather(*(invoke(name, i) for name, i in interactions.items()))
+        finally:
+            await faction.torn.close()
+    for name, interaction in interactions.items():
+        waited = interaction.responded_at - interaction.created_at
+        assert waited < 3, f"/{name} first answered after {waited:.1f}s"
+        assert interaction.messages[-1], f"/{name} never sent its answer"
+
+
+@check
+async def commands_refresh_the_members_they_read_first():
+    import bot
+    from benchmarks.load_test import configure, invoke
+
+    fixture = FactionFixture(50, 5)
+    pid = fixture.member_ids[0]
+    async with FakeTorn(fixture, latency=0) as torn:
+        faction, guild, channel = configure(fixture, torn.url, 0)
+        faction.torn.cache = ResponseCache()
+        requested = {}
+        user = FakeUser(pid, f"{fixture.names[pid]} [{pid}]", 0)
+        try:
+            for name in ("oc_assignments", "forecast"):
+                faction.statuses.refresh_in_background = lambda first=(), name=name: requested.setdefault(name, set(first))
+                await invoke(name, FakeInteraction(user, channel, guild, 0))
+        finally:
+            del faction.statuses.refresh_in_background
+            await faction.torn.close()
+    # Every fixture member is on the CPR sheet
+    for name in ("oc_assignments", "forecast"):
+        assert requested.get(name) == set(fixture.member_ids), (name, requested.get(name))
+
+
+@check
+def timeline_keeps_recruiting_members_busy():
+    now = 1_000_000
+    crimes = [
+        {"name": "Recruiting", "ready_at": None, "slots": [{"user": {"id": 1}}, {"user": None}]},
+        {"name": "Planning", "ready_at": now + 3600, "slots": [{"user": {"id": 2}}]},
+    ]
+    members = [Member(1, in_oc=True, last_action=now), Member(2, in_oc=True, last_action=now),
+               Member(3, last_action=now)]
+    timeline = Timeline(crimes, members, now)
+    assert timeline.available() == {2, 3}, timeline.available()
+    assert timeline.free_within(30 * 86400) == [(3, now), (2, now + 3600)]
+    assert timeline.crime_of[1] == "Recruiting"
+
+
+def main():
+    names = sys.argv[1:] or list(CHECKS)
+    failed = 0
+    for name in names:
+        try:
+            result = CHECKS[name]()
+            if inspect.iscoroutine(result):
+                asyncio.run(result)
+        except Exception:
+            failed += 1
+            print(f"❌ {name}")
+            traceback.print_exc()
+        else:
+            print(f"✅ {name}")
+    if failed:
+        raise SystemExit(f"{failed} of {len(names)} checks failed")
+
+
+if __name__ == "__main__":
+    main()
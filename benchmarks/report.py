@@ -0,0 +1,58 @@
+"""
+Timing and memory measurement shared by the benchmarks.
+"""
+import gc
+import time
+import tracemalloc
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def measure(fn, repeat=5):
+    """
+    Run fn `repeat` times for timing, then once more under tracemalloc
+    (which slows it down) for peak memory. Returns (result, stats) where
+    stats has best/median milliseconds and peak KiB allocated.
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {
+        "best_ms": min(times) * 1000,
+        "median_ms": percentile(times, 50) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def latency_stats(seconds):
+    """p50/p95/p99/max in milliseconds for a list of latencies in seconds."""
+    return {
+        "p50_ms": percentile(seconds, 50) * 1000,
+        "p95_ms": percentile(seconds, 95) * 1000,
+        "p99_ms": percentile(seconds, 99) * 1000,
+        "max_ms": max(seconds) * 1000,
+    }
+
+
+def print_table(rows, columns):
+    """rows: list of dicts; columns: [(key, header, format spec)]."""
+    cells = [[format(row[key], spec) for key, _, spec in columns] for row in rows]
+    widths = [max([len(header)] + [len(line[i]) for line in cells]) for i, (_, header, _) in enumerate(columns)]
+    print("  ".join(header.rjust(w) for (_, header, _), w in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(cell.rjust(w) for cell, w in zip(line, widths)))
@@ -0,0 +1,237 @@
+"""
+Responsiveness checks: the event loop has to keep answering Discord
+while the bot waits on Torn or works through a big assignment run.
+
+- torn: fires concurrent TornClient calls at a fake Torn server that
+  takes --torn-latency seconds per request, sampling event loop lag (how
+  late a short sleep wakes up) the whole time.
+- ping: runs --assignments concurrent /oc_assignments on a
+  --members/--crimes fixture and sends /ping every 50 ms meanwhile,
+  timing each /ping's response against /ping on an idle bot.
+
+Exits with status 1 if the torn lag, or the /ping slowdown over idle,
+is worse than --max-lag.
+
+    python -m benchmarks.responsiveness [--checks torn,ping] [--torn-latency 2] [--calls 16]
+                                        [--assignments 8] [--members 1000] [--crimes 100] [--baseline]
+
+--baseline also does each check's work blocking the loop, the way the
+bot did before: waiting on Torn synchronously, and matching inline
+instead of on the process pool. It shows what the checks catch. (Real
+blocking requests can't be used: the fake server runs on the same loop
+and could never answer them.)
+"""
+import os
+import time
+import types
+import asyncio
+import argparse
+
+# bot.py (imported by the ping check) and torn_api read these at import;
+# nothing is sent to Discord or Torn
+os.environ.setdefault("DISCORD_BOT_TOKEN", "responsiveness")
+os.environ.setdefault("TORN_API_KEY", "responsiveness")
+
+import executor
+from api_limiter import APILimiter
+from torn_api import TornClient
+from oc_matching import assign_slots
+from benchmarks.fixtures import FactionFixture
+from benchmarks.fakes import FakeTorn, FakeUser, FakeInteraction
+from benchmarks.report import latency_stats, print_table
+
+# Seconds between lag samples
+LAG_SAMPLE = 0.02
+# Seconds between /ping invocations
+PING_INTERVAL = 0.05
+# /ping invocations timed on the idle bot
+IDLE_PINGS = 20
+
+
+async def sample_lag(samples, interval=LAG_SAMPLE):
+    """Like metrics.watch_event_loop, but keeps every sample."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def while_sampling(work):
+    """Await work with the lag sampler running; returns (result, seconds taken, lag samples)."""
+    samples = []
+    sampler = asyncio.create_task(sample_lag(samples))
+    start = time.perf_counter()
+    try:
+        result = await work
+    finally:
+        sampler.cancel()
+    return result, time.perf_counter() - start, samples
+
+
+def row(check, calls, answered, elapsed, samples):
+    lag = latency_stats(samples or [0.0])
+    return {"check": check, "calls": calls, "answered": answered, "elapsed": elapsed,
+            "lag_p99_ms": lag["p99_ms"], "lag_max_ms": lag["max_ms"]}
+
+
+async def slow_torn(torn, member_ids, latency):
+    client = TornClient(APILimiter(10_000, keys=["bench"]), base_url=torn.url, timeout=latency * 4)
+    try:
+        # Different users, so the cache can't fold the calls into one
+        calls = asyncio.gather(*(client.get_member_status(pid) for pid in member_ids))
+        results, elapsed, samples = await while_sampling(calls)
+    finally:
+        await client.close()
+    return row("async TornClient", len(member_ids), sum(1 for r in results if r), elapsed, samples)
+
+
+async def blocking_torn(member_ids, latency):
+    async def calls():
+        for _ in member_ids:
+            time.sleep(latency)
+            await asyncio.sleep(0)
+        return len(member_ids)
+
+    answered, elapsed, samples = await while_sampling(calls())
+    return row("blocking baseline", len(member_ids), answered, elapsed, samples)
+
+
+async def check_torn(args):
+    fixture = FactionFixture(max(args.calls, 1), 5)
+    member_ids = fixture.member_ids[:args.calls]
+    async with FakeTorn(fixture, latency=args.torn_latency) as torn:
+        rows = [await slow_torn(torn, member_ids, args.torn_latency)]
+        if args.baseline:
+            rows.append(await blocking_torn(member_ids, args.torn_latency))
+    return rows
+
+
+async def ping(bot, user, channel, sent_at=None):
+    """Seconds from sent_at (default now) until one /ping invocation has answered."""
+    interaction = FakeInteraction(user, channel, latency=0)
+    if sent_at is not None:
+        interaction.created_at = sent_at
+    await bot.tree.get_command("ping").callback(interaction)
+    return interaction.responded_at - interaction.created_at
+
+
+async def ping_while(bot, user, channel, work):
+    """
+    /ping every PING_INTERVAL until work is done; returns (seconds taken,
+    /ping times). Each is timed from when it was due, so a loop too busy
+    to pick it up on time counts against it.
+    """
+    task = asyncio.ensure_future(work)
+    start = time.perf_counter()
+    times = []
+    while not task.done():
+        sent_at = start + (len(times) + 1) * PING_INTERVAL
+        await asyncio.sleep(max(0.0, sent_at - time.perf_counter()))
+        times.append(await ping(bot, user, channel, sent_at))
+    await task
+    return time.perf_counter() - start, times
+
+
+async def check_ping(args):
+    # Imported here so the torn check runs without discord.py's startup cost
+    import bot
+    from eligibility import load_index
+    from benchmarks.load_test import configure, invoke
+
+    fixture = FactionFixture(args.members, args.crimes)
+    pid = fixture.member_ids[0]
+    async with FakeTorn(fixture, latency=0.05) as torn:
+        faction, guild, channel = configure(fixture, torn.url, 0)
+        user = FakeUser(pid, f"{fixture.names[pid]} [{pid}]", 0)
+        # /ping reports the gateway heartbeat latency, which needs a connection
+        bot.bot.ws = types.SimpleNamespace(latency=0.05)
+        # Build the index and fill the Torn cache first, so the runs below are matching
+        index = await load_index(bot.sheets, faction.oc_sheet_key)
+        crimes = (await faction.torn.get_crimes_data()).get("crimes", [])
+
+        idle = [await ping(bot, user, channel) for _ in range(IDLE_PINGS)]
+        rows = [row("/ping, idle", len(idle), len(idle), sum(idle), idle)]
+
+        runs = asyncio.gather(*(
+            invoke("oc_assignments", FakeInteraction(user, channel, guild, 0)) for _ in range(args.assignments)
+        ))
+        elapsed, times = await ping_while(bot, user, channel, runs)
+        rows.append(row(f"/ping, {args.assignments} /oc_assignments", len(times), len(times), elapsed, times))
+
+        if args.baseline:
+            open_slots = index.open_slots(crimes)
+            available = set(fixture.member_ids)
+
+            async def inline():
+                for _ in range(args.assignments):
+                    assign_slots(open_slots, available, index.role_index())
+                    await asyncio.sleep(0)
+
+            elapsed, times = await ping_while(bot, user, channel, inline())
+            rows.append(row("/ping, matching on the loop", len(times), len(times), elapsed, times))
+        await faction.torn.close()
+    return rows
+
+
+CHECKS = {"torn": check_torn, "ping": check_ping}
+
+
+async def run_checks(args):
+    return {name: await CHECKS[name](args) for name in args.checks.split(",")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checks", default="torn,ping", help=f"comma-separated, from {','.join(CHECKS)}")
+    parser.add_argument("--torn-latency", type=float, default=2.0, help="seconds per fake Torn request")
+    parser.add_argument("--calls", type=int, default=16, help="concurrent Torn calls")
+    parser.add_argument("--assignments", type=int, default=8, help="concurrent /oc_assignments")
+    parser.add_argument("--members", type=int, default=1000, help="fixture faction size for /oc_assignments")
+    parser.add_argument("--crimes", type=int, default=100, help="crime types in that fixture")
+    parser.add_argument("--max-lag", type=float, default=0.1, help="worst event loop lag allowed, seconds")
+    parser.add_argument("--baseline", action="store_true", help="also do the work blocking the loop, for comparison")
+    args = parser.parse_args()
+
+    executor.start()
+    try:
+        results = asyncio.run(run_checks(args))
+    finally:
+        executor.shutdown()
+
+    failures = []
+    if "torn" in results:
+        rows = results["torn"]
+        print(f"Fake Torn answers in {args.torn_latency:.1f}s; event loop lag sampled every {LAG_SAMPLE * 1000:.0f} ms")
+        print_table(rows, [
+            ("check", "check", ""),
+            ("calls", "calls", ""),
+            ("answered", "answered", ""),
+            ("elapsed", "elapsed s", ".2f"),
+            ("lag_p99_ms", "lag p99 ms", ".1f"),
+            ("lag_max_ms", "lag max ms", ".1f"),
+        ])
+        worst = rows[0]["lag_max_ms"] / 1000
+        if worst > args.max_lag:
+            failures.append(f"event loop stalled for {worst:.2f}s while waiting on Torn")
+    if "ping" in results:
+        rows = results["ping"]
+        print(f"/ping response time, {args.members} members and {args.crimes} crimes")
+        print_table(rows, [
+            ("check", "check", ""),
+            ("calls", "pings", ""),
+            ("elapsed", "elapsed s", ".2f"),
+            ("lag_p99_ms", "p99 ms", ".1f"),
+            ("lag_max_ms", "max ms", ".1f"),
+        ])
+        slowdown = (rows[1]["lag_max_ms"] - rows[0]["lag_max_ms"]) / 1000
+        if slowdown > args.max_lag:
+            failures.append(f"/ping was up to {slowdown:.2f}s slower during /oc_assignments")
+
+    if failures:
+        raise SystemExit(f"❌ {'; '.join(failures)} (limit {args.max_lag}s)")
+    print("✅ Event loop stayed responsive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+What-if runs of simulation.py: plays OC planning policies over fixture
+factions or the bot's recorded history, in parallel on a process pool,
+and reports slot fill rate and scope usage per policy.
+
+    python -m benchmarks.what_if [--runs 200] [--cycles 50] [--policies policies.json]
+    python -m benchmarks.what_if --history faction_history.db --snapshots sheet_snapshots.db --days 14
+
+policies.json is a list of {"name", "oc_levels", "assignment", "creation"}
+(see simulation.py); by default min_cpr is swept around OC_LEVELS for
+the "suggested" creation rule.
+"""
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import simulation
+from eligibility import EligibilityIndex
+from models import CPRTable
+from benchmarks.fixtures import FactionFixture
+from benchmarks.report import print_table
+
+
+def fixture_snapshots(members, crimes, count, seed=1, scope=40):
+    """simulation.Snapshot of `count` synthetic factions from benchmarks.fixtures."""
+    snapshots = []
+    for i in range(count):
+        fixture = FactionFixture(members, crimes, seed + i)
+        index = EligibilityIndex(*fixture.eligibility_rows())
+        cpr_table = CPRTable.from_rows(fixture.cpr_sheet())
+        activity = {
+            pid: simulation.ACTIVE_CHANCE if fixture.now - last < 86400 else simulation.INACTIVE_CHANCE
+            for pid, last in fixture.last_action.items()
+        }
+        crimes_list = fixture.torn_crimes()["crimes"]
+        snapshots.append(simulation.Snapshot.from_torn(index, cpr_table, crimes_list, activity, scope))
+    return snapshots
+
+
+def load_snapshots(args):
+    if args.history is None:
+        return fixture_snapshots(args.members, args.crimes, args.snapshots_count, scope=args.scope)
+
+    from config import CONFIG
+    from factions import DEFAULT_OC_SHEET
+    from faction_history import FactionHistory
+    from sheet_sync import SnapshotStore
+    cpr_sheet_key = args.cpr_sheet_key or CONFIG.get("google_sheet_id")
+    cpr_sheet_name = args.cpr_sheet_name or CONFIG.get("cpr_sheet_name")
+    if not cpr_sheet_key or not cpr_sheet_name:
+        raise SystemExit("Set google_sheet_id and cpr_sheet_name in config.json or pass --cpr-sheet-key/--cpr-sheet-name.")
+    return simulation.history_snapshots(
+        FactionHistory(args.history),
+        SnapshotStore(args.snapshots),
+        args.oc_sheet_key or CONFIG.get("oc_sheet_id", DEFAULT_OC_SHEET),
+        cpr_sheet_key,
+        cpr_sheet_name,
+        since=time.time() - args.days * 86400,
+        limit=args.snapshots_count,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200, help="simulated runs per policy")
+    parser.add_argument("--cycles", type=int, default=50, help="planning cycles per run")
+    parser.add_argument("--policies", help="JSON file of policies (default: simulation.default_policies)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--members", type=int, default=100, help="fixture faction size")
+    parser.add_argument("--crimes", type=int, default=20, help="crime types in the fixture")
+    parser.add_argument("--scope", type=int, default=40, help="starting scope for fixtures")
+    parser.add_argument("--snapshots-count", type=int, default=10, help="starting snapshots to cycle through")
+    parser.add_argument("--history", help="faction_history.db to replay instead of fixtures")
+    parser.add_argument("--snapshots", default="sheet_snapshots.db", help="stored sheet downloads, with --history")
+    parser.add_argument("--days", type=float, default=14, help="history window, with --history")
+    parser.add_argument("--oc-sheet-key", help="with --history (default: oc_sheet_id from config.json)")
+    parser.add_argument("--cpr-sheet-key", help="with --history (default: google_sheet_id from config.json)")
+    parser.add_argument("--cpr-sheet-name", help="with --history (default: cpr_sheet_name from config.json)")
+    args = parser.parse_args()
+
+    if args.policies:
+        with open(args.policies) as f:
+            policies = json.load(f)
+    else:
+        policies = simulation.default_policies()
+    snapshots = load_snapshots(args)
+    if not snapshots:
+        raise SystemExit("No snapshots to start from.")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        summaries = simulation.evaluate(snapshots, policies, args.runs, args.cycles, pool)
+    elapsed = time.perf_counter() - start
+
+    total = len(policies) * args.runs * args.cycles
+    print(f"{total:,} cycles ({len(policies)} policies x {args.runs} runs x {args.cycles}) "
+          f"from {len(snapshots)} snapshots in {elapsed:.1f}s")
+    print_table(sorted(summaries, key=lambda s: -s["fill_rate"]), [
+        ("policy", "policy", ""),
+        ("fill_rate", "fill rate", ".3f"),
+        ("fill_rate_sd", "±", ".3f"),
+        ("scope_usage", "scope used", ".3f"),
+        ("scope_usage_sd", "±", ".3f"),
+        ("completed", "crimes/run", ".1f"),
+        ("expired", "expired/run", ".1f"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
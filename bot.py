@@ -1,33 +1,41 @@
 
+import time
+# Taken before the other imports so the startup report includes them
+STARTED_AT = time.perf_counter()
 import discord
 import asyncio
 from discord.ext import tasks, commands
 import os
 import json
 import re
-import gspread
+import hashlib
 from pathlib import Path
-from torn_api import get_faction_data
-from torn_api import get_faction_balances
-from torn_api import get_crimes_data
-from cpr_sync import load_cpr_data
-from oc_assignment import suggest_oc
+import config
+from config import CONFIG
+from sheet_sync import sync as sheets
+from oc_assignment import suggest_oc_batch
+from oc_matching import assign_slots
+from forecast import Timeline, forecast_fill
+from eligibility import load_index
+from api_limiter import PRIORITY_BACKGROUND
+from torn_api import is_stale
+from dispatcher import MessageDispatcher, paginate
+from member_directory import MemberDirectory, parse_torn_id
+from sheet_writer import SheetWriter
+from ledger import DELINQUENTS_SHEET
+from factions import FactionRegistry
+import executor
+import metrics
+from executor import run_io, run_cpu
 from discord import app_commands
-from google.oauth2.service_account import Credentials
 from threading import Thread
-from flask import Flask
 from datetime import datetime
 
+metrics.record_startup_phase("imports", time.perf_counter() - STARTED_AT)
 
 # to fake trafic to keep bot running
-app = Flask('')
-
-@app.route('/')
-def home():
-    return "Bot is alive."
-
 def run():
-    app.run(host='0.0.0.0', port=8080)
+    create_app().run(host='0.0.0.0', port=8080)
 
 def keep_alive():
     t = Thread(target=run)
@@ -42,41 +50,208 @@ DISCORD_TOKEN = os.environ["DISCORD_BOT_TOKEN"]
 if not DISCORD_TOKEN:
     raise ValueError("DISCORD_BOT_TOKEN not found in Secrets!")
 
-# Load config.json once
-config_path = BASE_DIR / 'config.json'
-with open(config_path) as f:
-    CONFIG = json.load(f)
-
-DISCORD_CHANNEL_ID = int(CONFIG.get("discord_channel_id", 0))
-if DISCORD_CHANNEL_ID == 0:
-    print("⚠️ No discord_channel_id found in config. Use /setchannel in Discord to set one.")
+# One entry per faction; see FactionRegistry for the "guilds" config block
+with metrics.startup_phase("factions"):
+    factions = FactionRegistry(CONFIG)
+for faction in factions:
+    if faction.channel_id == 0:
+        print(f"⚠️ No discord_channel_id found for {faction.name}. Use /setchannel in Discord to set one.")
 
 intents = discord.Intents.default()
 intents.guilds = True
 intents.members = True
 intents.presences = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Log a breakdown of any slash command slower than this many seconds
+SLOW_COMMAND_SECONDS = CONFIG.get("slow_command_seconds")
+
+class TimedCommandTree(app_commands.CommandTree):
+    # Runs before every slash command; the trace is finished in
+    # on_app_command_completion or the tree's error handler
+    async def interaction_check(self, interaction):
+        if interaction.type == discord.InteractionType.application_command:
+            interaction.extras["trace"] = metrics.start_trace(f"/{interaction.data.get('name')}")
+        return True
+
+def finish_command(interaction, result):
+    trace = interaction.extras.pop("trace", None)
+    if trace is None:
+        return
+    command = interaction.command.qualified_name if interaction.command else trace.name[1:]
+    elapsed = trace.elapsed()
+    metrics.COMMAND_SECONDS.observe(elapsed, command=command, result=result)
+    if SLOW_COMMAND_SECONDS and elapsed > SLOW_COMMAND_SECONDS:
+        print(f"🐢 Slow command: {trace.format()}")
+
+# Past a couple of thousand guilds Discord requires sharding
+if CONFIG.get("auto_shard"):
+    BotBase = commands.AutoShardedBot
+    shard_options = {"shard_count": CONFIG["shard_count"]} if "shard_count" in CONFIG else {}
+else:
+    BotBase = commands.Bot
+    shard_options = {}
+
+class OCBot(BotBase):
+    # Runs once per process, after login and before the gateway connects;
+    # on_ready runs again on every reconnect
+    async def setup_hook(self):
+        # Buttons posted before a restart are matched by custom_id, nothing is reposted
+        self.add_view(BalanceRequestView())
+        self.add_dynamic_items(DelinquentButton)
+
+        # Commands answer from the last run's data until it's refreshed
+        with metrics.startup_phase("restore_caches"):
+            restored = {faction.name: faction.restore_cache() for faction in factions}
+            snapshots = await run_io(sheets.preload)
+        print(f"♻️ Restored Torn responses {restored} and {snapshots} sheet snapshots.")
+
+        with metrics.startup_phase("command_sync"):
+            await sync_commands()
+
+        heartbeat.start()
+        global lag_watcher
+        lag_watcher = asyncio.create_task(metrics.watch_event_loop())
+        asyncio.create_task(warm_indexes())
+
+    async def close(self):
+        for task in monitor_tasks.values():
+            task.cancel()
+        if lag_watcher is not None:
+            lag_watcher.cancel()
+        await sheet_writer.close()
+        await factions.close()
+        await super().close()
+        executor.shutdown()
+
+bot = OCBot(command_prefix="!", intents=intents, tree_cls=TimedCommandTree, **shard_options)
 
 tree = bot.tree  # for slash commands
 
+dispatcher = MessageDispatcher()
+# Seconds a recorded poll can answer /status without asking Torn
+STATUS_MAX_AGE = 300
+sheet_writer = SheetWriter()
+
+# guild id -> MemberDirectory, kept current by the member events below
+member_directories = {}
+
+def directory_for(guild):
+    if guild is None:
+        return None
+    directory = member_directories.get(guild.id)
+    if directory is None:
+        directory = MemberDirectory(guild.members)
+        member_directories[guild.id] = directory
+    return directory
+
+def torn_id_of(interaction, name=None):
+    """Torn ID of the caller, or of a 'name [id]' / member name argument."""
+    directory = directory_for(interaction.guild)
+    target = interaction.user if name is None else name
+    if directory is None:
+        return parse_torn_id(target if isinstance(target, str) else target.display_name)
+    return directory.torn_id(target)
+
+async def faction_of(interaction):
+    """The faction configured for the interaction's guild; answers the interaction if there is none."""
+    faction = factions.for_guild(interaction.guild)
+    if faction is None:
+        await interaction.response.send_message("No faction is configured for this server.", ephemeral=True)
+    return faction
+
+async def send_followup(interaction, content, ephemeral=False, **kwargs):
+    """
+    Answer a command that deferred publicly. Discord turns the first
+    followup into the deferred response, which can't become ephemeral, so
+    a private answer replaces it instead.
+    """
+    if ephemeral:
+        await interaction.delete_original_response()
+    await interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
+
 @tree.error
 async def on_app_command_error(interaction, error):
-    if isinstance(error, discord.app_commands.errors.CommandOnCooldown):
+    on_cooldown = isinstance(error, discord.app_commands.errors.CommandOnCooldown)
+    finish_command(interaction, "cooldown" if on_cooldown else "error")
+    if on_cooldown:
         await interaction.response.send_message("Slow down!", ephemeral=True)
 
+@bot.event
+async def on_app_command_completion(interaction, command):
+    finish_command(interaction, "ok")
+
 tree.global_command_check = discord.app_commands.checks.cooldown(1, 3.0)  # 1 use every 3s
 
+lag_watcher = None
+first_ready = True
+
+# "<application id>:<hash of the command definitions>" as of the last tree.sync();
+# delete the file to force a sync
+COMMAND_HASH_FILE = BASE_DIR / "command_tree.sha256"
+
+def command_tree_hash():
+    definitions = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda d: d["name"])
+    return hashlib.sha256(json.dumps(definitions, sort_keys=True).encode()).hexdigest()
+
+async def sync_commands():
+    """tree.sync() only when the slash commands changed since the last sync."""
+    digest = f"{bot.application_id}:{command_tree_hash()}"
+    try:
+        last = COMMAND_HASH_FILE.read_text().strip()
+    except OSError:
+        last = None
+    if digest == last:
+        print("✅ Slash commands unchanged, skipping sync.")
+        return
+    try:
+        synced = await tree.sync()
+    except discord.HTTPException as e:
+        print(f"⚠️ Slash command sync failed: {e}")
+        return
+    COMMAND_HASH_FILE.write_text(digest)
+    print(f"✅ Synced {len(synced)} global slash commands.")
+
+async def warm_indexes():
+    """Rebuild each faction's eligibility index from the restored sheet snapshots."""
+    with metrics.startup_phase("warm_indexes"):
+        for faction in factions:
+            try:
+                await load_index(sheets, faction.oc_sheet_key)
+            except Exception as e:
+                print(f"⚠️ Could not load the eligibility index for {faction.name}: {e}")
+
 @bot.event
 async def on_ready():
     print(f'✅ Logged in as {bot.user} (ID: {bot.user.id})')
     print("📡 Starting OC monitor task...")
     print(f"📁 Loaded config: {CONFIG}")
-    monitor_ocs.start()
-    heartbeat.start()
+    for guild in bot.guilds:
+        member_directories[guild.id] = MemberDirectory(guild.members)
+    start_monitors()
+    global first_ready
+    if first_ready:
+        first_ready = False
+        metrics.record_startup_phase("ready", time.perf_counter() - STARTED_AT)
 
-    synced = await tree.sync()
-    print(f"✅ Synced {len(synced)} global slash commands.")
+@bot.event
+async def on_member_join(member):
+    directory_for(member.guild).add(member)
+
+@bot.event
+async def on_member_remove(member):
+    directory_for(member.guild).remove(member)
+
+@bot.event
+async def on_member_update(before, after):
+    directory_for(after.guild).update(after)
+
+@bot.event
+async def on_user_update(before, after):
+    # Username changes arrive per user, not per guild member
+    for directory in member_directories.values():
+        member = directory.members.get(after.id)
+        if member is not None:
+            directory.update(member.guild.get_member(after.id) or member)
 
 @tree.command(name="ping", description="Health check")
 async def slash_ping(interaction: discord.Interaction):
@@ -84,29 +259,47 @@ async def slash_ping(interaction: discord.Interaction):
 
 @tree.command(name="status", description="Current faction scope status")
 async def slash_status(interaction: discord.Interaction):
-    faction_data = get_faction_data()
-    faction_name = faction_data.get('name', 'Unknown')
-    scope = faction_data.get('crimes', {}).get('scope', 'Unknown')
-    await interaction.response.send_message(f"📢 Faction: **{faction_name}**\n🔋 Current Scope: **{scope}**")
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
+    # A cold cache can take longer than Discord's 3s to answer
+    await interaction.response.defer()
+    # The monitor loop records every poll; only go to Torn if it's out of date
+    poll = await run_io(faction.history.latest_poll)
+    as_of = None
+    if poll and time.time() - poll[0] < STATUS_MAX_AGE:
+        _, faction_name, scope = poll
+    else:
+        faction_data = await faction.torn.get_faction_data(allow_stale=True)
+        faction_name = faction_data.get('name', 'Unknown')
+        scope = faction_data.get('crimes', {}).get('scope', 'Unknown')
+        if is_stale(faction_data):
+            as_of = faction_data.fetched_at
+    message = f"📢 Faction: **{faction_name}**\n🔋 Current Scope: **{scope}**"
+    if as_of is not None:
+        message += f"\n🕒 As of <t:{int(as_of)}:R>"
+    await interaction.followup.send(message)
 
 @tree.command(name="setchannel", description="Set current channel for OC alerts")
 async def slash_setchannel(interaction: discord.Interaction):
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
     channel_id = interaction.channel.id
 
-    CONFIG["discord_channel_id"] = str(channel_id)
-    with open(config_path, "w") as f:
-        json.dump(CONFIG, f, indent=4)
-
-    global DISCORD_CHANNEL_ID
-    DISCORD_CHANNEL_ID = channel_id
+    faction.set_channel(channel_id)
+    config.save()
 
     await interaction.response.send_message(f"✅ This channel is now set for OC alerts: **{interaction.channel.name}**")
 
 async def member_autocomplete(interaction: discord.Interaction, current: str):
+    directory = directory_for(interaction.guild)
+    if directory is None:
+        return []
     return [
         app_commands.Choice(name=m.display_name, value=m.display_name)
-        for m in interaction.guild.members if current.lower() in m.display_name.lower()
-    ][:25]
+        for m in directory.search(current, limit=25)
+    ]
 
 @tree.command(name="purge", description="Delete all messages sent by the bot in this channel.")
 @app_commands.checks.has_permissions(manage_messages=True)
@@ -123,164 +316,244 @@ async def purge(interaction: discord.Interaction):
 @app_commands.describe(member="Optional: provide a name like 'shandurai [25719]'")
 @app_commands.autocomplete(member=member_autocomplete)
 async def balance(interaction, member: str = None):
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
+    # Torn may be slow; the deferred reply has 15 minutes instead of 3s
+    await interaction.response.defer()
     try:
-        data = get_faction_balances()
+        data = await faction.torn.get_faction_balances(allow_stale=True)
         balance_data = data.get('balance', {})
         members_list = balance_data.get('members', [])
         if not isinstance(members_list, list):
-            await interaction.response.send_message("Faction data format error or missing members list.", ephemeral=True)
+            await send_followup(interaction, "Faction data format error or missing members list.", ephemeral=True)
             return
+        # A stale response isn't what Torn says now; recording it would date old balances as new
+        if members_list and not is_stale(data):
+            await run_io(faction.history.record_balances, data)
 
         # If no member input, use the caller's display name
         name_to_check = interaction.user.display_name if member is None else member
-        match = re.search(r'\[(\d+)\]', name_to_check)
-        torn_id = int(match.group(1)) if match else None
+        torn_id = torn_id_of(interaction, member)
 
         if torn_id is None:
-            await interaction.response.send_message(f"Could not extract Torn ID from '{name_to_check}'. Make sure the name includes [ID].", ephemeral=True)
+            await send_followup(interaction, f"Could not extract Torn ID from '{name_to_check}'. Make sure the name includes [ID].", ephemeral=True)
             return
 
         torn_member = next((m for m in members_list if m.get('id') == torn_id), None)
+        recorded = await run_io(faction.history.balance_at, torn_id) if not members_list else None
 
-        if torn_member:
+        if recorded:
+            # Torn didn't answer; fall back to the last balance we recorded
+            money, points = recorded
+            await interaction.followup.send(f" {name_to_check}\n💰 Cash: ${money:,}\n✨ Points: {points}\n🕒 Last recorded balance, Torn is not responding.")
+        elif torn_member:
             money = torn_member.get('money', 0)
             points = torn_member.get('points', 0)
-            await interaction.response.send_message(f" {torn_member['username']}\n💰 Cash: ${money:,}\n✨ Points: {points}")
+            as_of = f"\n🕒 As of <t:{int(data.fetched_at)}:R>" if is_stale(data) else ""
+            await interaction.followup.send(f" {torn_member['username']}\n💰 Cash: ${money:,}\n✨ Points: {points}{as_of}")
         else:
-            await interaction.response.send_message(f"No Torn account found for ID {torn_id}.", ephemeral=True)
+            await send_followup(interaction, f"No Torn account found for ID {torn_id}.", ephemeral=True)
     except Exception as e:
-        await interaction.response.send_message(f"Error fetching balance: {str(e)}", ephemeral=True)
+        await send_followup(interaction, f"Error fetching balance: {str(e)}", ephemeral=True)
 
 class BalanceRequestView(discord.ui.View):
-    def __init__(self, requester, link):
-        super().__init__()
-        self.requester = requester
-        self.link = link
+    # Fixed custom_ids and no timeout: registered once in setup_hook, the
+    # buttons keep working on every request message across restarts
+    def __init__(self):
+        super().__init__(timeout=None)
 
-    @discord.ui.button(label="✅ Complete", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="✅ Complete", style=discord.ButtonStyle.success, custom_id="balance_request:complete")
     async def complete(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(content=f"✅ Completed by: {interaction.user.display_name}", view=None)
 
-    @discord.ui.button(label="❌ Cancel", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="❌ Cancel", style=discord.ButtonStyle.danger, custom_id="balance_request:cancel")
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(content="❌ Request canceled", view=None)
 
-async def member_autocomplete(interaction: discord.Interaction, current: str):
-    return [
-        app_commands.Choice(name=m.display_name, value=m.display_name)
-        for m in interaction.guild.members if current.lower() in m.display_name.lower()
-    ][:25]
-
 @tree.command(name="balance_request", description="Request balance transfer with a specified amount")
 @app_commands.describe(amount="The amount you want to request")
 async def balance_request(interaction: discord.Interaction, amount: int):
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
+    # Torn may be slow; the deferred reply has 15 minutes instead of 3s
+    await interaction.response.defer()
     try:
-        data = get_faction_balances()
+        # Never stale: the amount is checked against the balance right now
+        data = await faction.torn.get_faction_balances()
         balance_data = data.get('balance', {})
         members_list = balance_data.get('members', [])
         if not isinstance(members_list, list):
-            await interaction.response.send_message("Faction data format error or missing members list.", ephemeral=True)
+            await send_followup(interaction, "Faction data format error or missing members list.", ephemeral=True)
+            return
+        if not members_list:
+            await send_followup(interaction, "Torn is not responding, try again in a moment.", ephemeral=True)
             return
 
+        await run_io(faction.history.record_balances, data)
+
         display_name = interaction.user.display_name
-        match = re.search(r'\[(\d+)\]', display_name)
-        torn_id = int(match.group(1)) if match else None
+        torn_id = torn_id_of(interaction)
 
         if torn_id is None:
-            await interaction.response.send_message(f"Could not extract Torn ID from '{display_name}'. Make sure the name includes [ID].", ephemeral=True)
+            await send_followup(interaction, f"Could not extract Torn ID from '{display_name}'. Make sure the name includes [ID].", ephemeral=True)
             return
 
         torn_member = next((m for m in members_list if m.get('id') == torn_id), None)
 
         if not torn_member:
-            await interaction.response.send_message(f"No Torn account found for ID {torn_id}.", ephemeral=True)
+            await send_followup(interaction, f"No Torn account found for ID {torn_id}.", ephemeral=True)
             return
 
         balance = torn_member.get('money', 0)
 
         if amount > balance:
-            await interaction.response.send_message(f"💰 Current balance: ${balance:,}\n❌ Error: Asking for more than you have.", ephemeral=True)
+            await send_followup(interaction, f"💰 Current balance: ${balance:,}\n❌ Error: Asking for more than you have.", ephemeral=True)
         else:
             link = f"https://www.torn.com/factions.php?step=your/tab=controls&option=give-to-user&giveMoneyTo={torn_id}&money={amount}"
-            view = BalanceRequestView(interaction.user, link)
-            await interaction.response.send_message(f"💰 Request link: {link}", view=view)
+            view = BalanceRequestView()
+            await interaction.followup.send(f"💰 Request link: {link}", view=view)
     except Exception as e:
-        await interaction.response.send_message(f"Error handling balance request: {str(e)}", ephemeral=True)
+        await send_followup(interaction, f"Error handling balance request: {str(e)}", ephemeral=True)
+
+
+# Transfers per embed page; two buttons each stays under Discord's 25 per message
+TRANSFERS_PER_PAGE = 10
+
+# custom_id of a /delinquents button: action, sheet row, the transfer's
+# index within that row, ledger fingerprint of the row when posted, and the
+# transfer's number on its page
+DELINQUENT_BUTTON_ID = re.compile(
+    r"delinquent:(?P<action>complete|clear):(?P<row>\d+):(?P<index>\d+):(?P<fingerprint>\d+):(?P<number>\d+)"
+)
+
+class DelinquentButton(discord.ui.DynamicItem[discord.ui.Button], template=DELINQUENT_BUTTON_ID):
+    """
+    A Complete or Clear button for one transfer. Everything needed to act
+    on a click is in its custom_id, so buttons posted before a restart
+    still work without reposting; the faction's ledger tracks which of a
+    row's transfers have been handled.
+    """
+
+    def __init__(self, action, sheet_row, index, fingerprint, number):
+        if action == "complete":
+            label, style = f"✅ {number}", discord.ButtonStyle.success
+        else:
+            label, style = f"❌ {number}", discord.ButtonStyle.danger
+        super().__init__(discord.ui.Button(
+            label=label, style=style,
+            custom_id=f"delinquent:{action}:{sheet_row}:{index}:{fingerprint}:{number}",
+        ))
+        self.action = action
+        self.sheet_row = sheet_row
+        self.index = index
+        self.fingerprint = fingerprint
+        self.number = number
+
+    @classmethod
+    def from_match(cls, match):
+        return cls(match["action"], int(match["row"]), int(match["index"]), int(match["fingerprint"]), int(match["number"]))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls.from_match(match)
+
+    async def callback(self, interaction: discord.Interaction):
+        faction = await faction_of(interaction)
+        if faction is None:
+            return
+        transfer = faction.ledger.lookup(self.sheet_row, self.index, self.fingerprint)
+        if transfer is None:
+            # Handled from another button, or the sheet moved under it; never write to a guess
+            await self._strike(interaction, "Already handled or no longer in the sheet")
+            return
 
+        # Acknowledge first; the sheet update is queued and sent in the next batch
+        if self.action == "complete":
+            await self._strike(interaction, f"✅ Completed by: {interaction.user.display_name}")
+            cells = [(f'H{self.sheet_row}', [['Yes']])]
+        else:
+            await self._strike(interaction, f"❌ Value Cleared by: {interaction.user.display_name}")
+            # Optional: clear a value in the sheet if needed
+            cells = [(f'AC{self.sheet_row}', [['']]),  # Example: clear 'From' (AC)
+                     (f'AD{self.sheet_row}', [['']])]  # Example: clear 'To' (AD)
+        sheet = await run_io(sheets.worksheet, faction.oc_sheet_key, DELINQUENTS_SHEET)
+        for cell, values in cells:
+            sheet_writer.write(sheet, cell, values)
+        await run_io(faction.ledger.resolve, transfer)
+
+    async def _strike(self, interaction, note):
+        # Strike the transfer's line and drop its buttons, keep the rest of the page
+        embed = interaction.message.embeds[0]
+        prefix = f"`{self.number}` "
+        embed.description = "\n".join(
+            f"~~{line}~~ {note}" if line.startswith(prefix) else line
+            for line in embed.description.split("\n")
+        )
+        view = DelinquentView.from_message(interaction.message, without=self.number)
+        await interaction.response.edit_message(embed=embed, view=view if view.children else None)
 
-class DelinquentView(discord.ui.View):
-    def __init__(self, sheet, row_idx, message):
-        super().__init__(timeout=None)
-        self.sheet = sheet
-        self.row_idx = row_idx
-        self.message = message
 
-    @discord.ui.button(label="✅ Complete", style=discord.ButtonStyle.success)
-    async def complete(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.sheet.update(f'H{self.row_idx + 2}', [['Yes']])  # +2 because header row + 1-based index
-        await interaction.response.edit_message(content=f"✅ Completed by: {interaction.user.display_name}", view=None)
+class DelinquentView(discord.ui.View):
+    """Complete/Clear buttons for every transfer on one /delinquents page."""
 
-    @discord.ui.button(label="❌ Clear", style=discord.ButtonStyle.danger)
-    async def clear(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Optional: clear a value in the sheet if needed
-        self.sheet.update(f'AC{self.row_idx + 2}', [['']])  # Example: clear 'From' (AC)
-        self.sheet.update(f'AD{self.row_idx + 2}', [['']])  # Example: clear 'To' (AD)
-        await interaction.response.edit_message(content=f"❌ Value Cleared by: {interaction.user.display_name}", view=None)
+    def __init__(self, buttons=()):
+        super().__init__(timeout=None)
+        for button in buttons:
+            self.add_item(button)
+
+    @classmethod
+    def for_transfers(cls, ledger, transfers, first_number):
+        buttons = []
+        for number, transfer in enumerate(transfers, start=first_number):
+            sheet_row = transfer["row"] + 2  # +2 because header row + 1-based index
+            fingerprint = ledger.fingerprint(transfer)
+            buttons.append(DelinquentButton("complete", sheet_row, transfer["index"], fingerprint, number))
+            buttons.append(DelinquentButton("clear", sheet_row, transfer["index"], fingerprint, number))
+        return cls(buttons)
+
+    @classmethod
+    def from_message(cls, message, without=None):
+        """The buttons still on message, rebuilt from their custom_ids, minus transfer number `without`."""
+        buttons = []
+        for row in message.components:
+            for component in getattr(row, "children", ()):
+                match = DELINQUENT_BUTTON_ID.fullmatch(getattr(component, "custom_id", None) or "")
+                if match and int(match["number"]) != without:
+                    buttons.append(DelinquentButton.from_match(match))
+        return cls(buttons)
 
 @tree.command(name="delinquents", description="Show delinquent transfers with buttons")
-async def delinquents(interaction: discord.Interaction):
+@app_commands.describe(repost="Post every outstanding transfer again, not just the ones without buttons")
+async def delinquents(interaction: discord.Interaction, repost: bool = False):
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
     try:
         await interaction.response.defer(ephemeral=True)
 
-        creds = Credentials.from_service_account_file(
-            'google_creds.json',
-            scopes=['https://www.googleapis.com/auth/spreadsheets']
+        ledger = faction.ledger
+        if repost:
+            await run_io(ledger.forget_posts)
+        # Only rows below the cursor and rows still open are read from the sheet
+        transfers = ledger.unposted(await run_io(ledger.update))
+        if not transfers:
+            await interaction.followup.send("✅ No new delinquent transfers to post.", ephemeral=True)
+            return
+
+        # A few embeds with a button pair per transfer instead of one message each
+        lines = [f"`{n}` {t['line']}" for n, t in enumerate(transfers, start=1)]
+        pages = paginate(lines, TRANSFERS_PER_PAGE)
+        starts = [sum(len(page) for page in pages[:i]) for i in range(len(pages))]
+        page_transfers = [transfers[start:start + len(page)] for start, page in zip(starts, pages)]
+        messages = await dispatcher.post_pages(
+            interaction.channel, "Delinquent transfers", pages,
+            lambda i: DelinquentView.for_transfers(ledger, page_transfers[i], starts[i] + 1),
         )
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key('15Ef4fK0cZH9xeUIwb0SjCj_SYf-wqvrp09qC6IneX7E').worksheet('Delinquents')
-        rows = sheet.get_all_values()
-        headers = rows[0]
-        records = rows[1:]
-
-        for idx, row in enumerate(records):
-            if len(row) < 32:
-                continue
-        
-            status = row[24].strip()
-            if status:
-                continue  # Already completed
-        
-            from_amount_raw = row[28]
-            from_id = row[29]
-            to_amount_raw = row[30]
-            to_ids_raw = row[31]
-        
-            if not from_amount_raw or not from_id:
-                continue
-        
-            try:
-                from_amount = -int(re.sub(r'[^\d]', '', from_amount_raw))
-                from_link = f"https://www.torn.com/factions.php?step=your/tab=controls&option=give-to-user&giveMoneyTo={from_id}&money={abs(from_amount)}"
-                await interaction.channel.send(
-                    f"💥 From ID link: {from_link}",
-                    view=DelinquentView(sheet, idx, f"From {from_id}")
-                )
-            except Exception as e:
-                print(f"Error parsing from: {e}")
-                continue
-        
-            try:
-                to_amount = int(re.sub(r'[^\d]', '', to_amount_raw))
-                to_ids = to_ids_raw.split()
-                for to_id in to_ids:
-                    link = f"https://www.torn.com/factions.php?step=your/tab=controls&option=give-to-user&giveMoneyTo={to_id}&money={to_amount}"
-                    await interaction.channel.send(
-                        f"💸 To ID link: {link}",
-                        view=DelinquentView(sheet, idx, f"To {to_id}")
-                    )
-            except Exception as e:
-                print(f"Error parsing to: {e}")
-                continue
+        for message, posted in zip(messages, page_transfers):
+            if message is not None:
+                await run_io(ledger.mark_posted, posted, message.id)
 
         if not interaction.response.is_done():
             await interaction.response.send_message("✅ Delinquents list posted.", ephemeral=True)
@@ -293,140 +566,43 @@ async def delinquents(interaction: discord.Interaction):
 
 @tree.command(name="oc_assignments", description="Assign available members to OC roles based on CPR and availability")
 async def oc_assignments(interaction: discord.Interaction):
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
     try:
         await interaction.response.defer(ephemeral=True)
 
-        creds = Credentials.from_service_account_file('google_creds.json', scopes=['https://www.googleapis.com/auth/spreadsheets'])
-        client = gspread.authorize(creds)
-
-        # Load Member CPR sheet
-        cpr_sheet = client.open_by_key('15Ef4fK0cZH9xeUIwb0SjCj_SYf-wqvrp09qC6IneX7E').worksheet('Member_CPR')
-        cpr_data = cpr_sheet.get_all_values()
-        headers = cpr_data[0]
-        levels = cpr_data[1]
-        roles = cpr_data[2]
-        member_cpr_dict = {}
-
-        for row in cpr_data[3:]:
-            name = row[0]
-            player_id = row[1]
-            if not player_id:
-                continue
-            member_cpr_dict[player_id] = {"Name": name}
-            for idx in range(3, len(row)):
-                oc_name = headers[idx]
-                if not oc_name:
-                    continue
-                member_cpr_dict[player_id][oc_name] = {
-                    "level": int(levels[idx]) if levels[idx].isdigit() else 0,
-                    "Role": roles[idx],
-                    "CPR": int(row[idx]) if row[idx].isdigit() else 0
-                }
-
-        # Load OC structure from Crime&Position sheet
-        crime_sheet = client.open_by_key('15Ef4fK0cZH9xeUIwb0SjCj_SYf-wqvrp09qC6IneX7E').worksheet('Crime&Position')
-        crime_data = crime_sheet.get_all_values()
-        oc_crime_dict = {}
-
-        for row in crime_data:
-            if len(row) < 19:
-                continue
-            oc_name = row[12]
-            if not oc_name:
-                continue
-            level = row[13]
-            role = row[14]
-            influence = row[17]
-            cpr_required = row[18]
-            if oc_name not in oc_crime_dict:
-                oc_crime_dict[oc_name] = {}
-            oc_crime_dict[oc_name][role] = {
-                "level": int(level) if level.isdigit() else 0,
-                "influence": influence,
-                "CPR required": int(cpr_required) if cpr_required.isdigit() else 0
-            }
-
-        # Fetch Torn OC crimes and members
-        crimes_data = get_crimes_data()
+        # CPR and crime requirements, rebuilt only when either sheet changes
+        index = await load_index(sheets, faction.oc_sheet_key)
+
+        # Fetch Torn OC crimes; the members that come with them refresh the
+        # faction's status table, which covers for a failed or empty fetch
+        crimes_data = await faction.torn.get_crimes_data()
         crimes = crimes_data.get("crimes", [])
-        members = crimes_data.get("members", [])
+        faction.statuses.update(crimes_data.get("members", []))
+        # Rows of members on the CPR sheet first: they're the ones this can assign
+        faction.statuses.refresh_in_background(first=index.names)
+        members = faction.statuses.members()
 
         now = int(datetime.utcnow().timestamp())
 
-        # Step 1–3: Filter available members
-        available_members = []
-        for m in members:
-            last_action = m.get("last_action", {}).get("timestamp", 0)
-            time_since = now - int(last_action)
-            if time_since > 86400:
-                continue
-            if not m["is_in_oc"]:
-                available_members.append(m)
-                continue
-            for c in crimes:
-                for slot in c.get("slots", []):
-                    user = slot.get("user")
-                    if user and user.get("id") == m["id"]:
-                        if int(c.get("ready_at", 0)) - now <= 7200:
-                            available_members.append(m)
-                        break
+        # Step 1–3: Available members: active, and idle or in a crime that's nearly ready
+        available_ids = Timeline(crimes, members, now).available()
 
         # Step 4: Identify roles needing fill
-        roles_needed = []
-        for c in crimes:
-            for slot in c.get("slots", []):
-                if slot.get("user") is None:
-                    roles_needed.append({
-                        "crime": c["name"],
-                        "level": next((v["level"] for v in oc_crime_dict.get(c["name"], {}).values()), 0),
-                        "position": slot["position"],
-                        "required_cpr": slot.get("checkpoint_pass_rate", 0)
-                    })
-
-        # Step 5: Assign members
-        assignments = []
-        top_role_tracker = {}
-
-        # Collect top 3 CPR roles per OC level
-        for oc_name, roles in oc_crime_dict.items():
-            sorted_roles = sorted(roles.items(), key=lambda r: -r[1].get("CPR required", 0))[:3]
-            for role_name, role_info in sorted_roles:
-                lvl = role_info["level"]
-                top_role_tracker.setdefault(lvl, []).append({
-                    "oc_name": oc_name,
-                    "role": role_name,
-                    "required_cpr": role_info["CPR required"]
-                })
-
-        # Step 6: Count eligible members for top roles
-        level_fill_counts = {}
-        for lvl, top_roles in top_role_tracker.items():
-            for m in available_members:
-                m_id = str(m["id"])
-                m_data = member_cpr_dict.get(m_id)
-                if not m_data:
-                    continue
-                for role in top_roles:
-                    oc_data = m_data.get(role["oc_name"])
-                    if oc_data and oc_data["Role"].lower() == role["role"].lower():
-                        if int(oc_data["CPR"]) >= role["required_cpr"]:
-                            level_fill_counts.setdefault(lvl, 0)
-                            level_fill_counts[lvl] += 1
-                            break
-
-        # Assign members to open roles
-        for role in sorted(roles_needed, key=lambda x: (-x["required_cpr"], -x["level"])):
-            for m in available_members:
-                m_id = str(m["id"])
-                m_data = member_cpr_dict.get(m_id)
-                if not m_data:
-                    continue
-                role_data = m_data.get(role["crime"])
-                if role_data and role_data["Role"].lower() == role["position"].lower():
-                    if int(role_data["CPR"]) >= role["required_cpr"]:
-                        assignments.append(f"{m_data['Name']} → {role['crime']} - {role['position']} (CPR: {role_data['CPR']})")
-                        available_members.remove(m)
-                        break
+        open_slots = sorted(index.open_slots(crimes), key=lambda s: (-s.required_cpr, -s.level))
+
+        # Step 5: Assign members to open roles (maximum matching, not first fit);
+        # only the candidates it can use are sent to the worker
+        role_index = index.role_index_for(open_slots, available_ids)
+        matched = await run_cpu(assign_slots, open_slots, available_ids, role_index)
+        assignments = [
+            f"{index.names[m_id]} → {slot.crime_name} - {slot.position} (CPR: {cpr})"
+            for slot, m_id, cpr in matched
+        ]
+
+        # Step 6: Count available members who qualify for the top roles of each level
+        level_fill_counts = index.level_fill_counts(available_ids)
 
         # Step 7: Suggest more crimes if needed
         suggestion = ""
@@ -444,57 +620,210 @@ async def oc_assignments(interaction: discord.Interaction):
             await interaction.followup.send(f"Error assigning OC roles: {str(e)}", ephemeral=True)
 
 
+def format_wait(seconds):
+    if seconds <= 0:
+        return "now"
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"in {hours}h {minutes:02d}m" if hours else f"in {minutes}m"
 
-@tasks.loop(minutes=1)
-async def heartbeat():
-    print("💓 Bot is alive...")
+# Members listed by /forecast before the rest are summarized
+FORECAST_MEMBERS = 25
 
-@tasks.loop(minutes=5)
-async def monitor_ocs():
+@tree.command(name="forecast", description="Who comes free over the next hours, and which OC slots they could fill")
+@app_commands.describe(hours="How far ahead to look", level="Only show slots of this OC level")
+async def forecast(interaction: discord.Interaction, hours: app_commands.Range[int, 1, 72] = 6, level: int = None):
+    faction = await faction_of(interaction)
+    if faction is None:
+        return
     try:
-        print("🔁 monitor_ocs running...")
-        faction_data = get_faction_data()
-        cpr_data = load_cpr_data()
+        await interaction.response.defer(ephemeral=True)
+
+        index = await load_index(sheets, faction.oc_sheet_key)
+        crimes_data = await faction.torn.get_crimes_data()
+        crimes = crimes_data.get("crimes", [])
+        faction.statuses.update(crimes_data.get("members", []))
+        faction.statuses.refresh_in_background(first=index.names)
+        members = faction.statuses.members()
+
+        now = int(datetime.utcnow().timestamp())
+        timeline = Timeline(crimes, members, now)
+        free = timeline.free_within(hours * 3600)
+
+        lines = [f"**Free within {hours}h:** {len(free)} members"]
+        for member_id, free_at in free[:FORECAST_MEMBERS]:
+            crime = timeline.crime_of.get(member_id)
+            lines.append(f"`{timeline.names[member_id]}` {format_wait(free_at - now)}" + (f" ({crime})" if crime else ""))
+        if len(free) > FORECAST_MEMBERS:
+            lines.append(f"…and {len(free) - FORECAST_MEMBERS} more")
+
+        open_slots = index.open_slots(crimes)
+        if level is not None:
+            open_slots = [s for s in open_slots if s.level == level]
+        # Now, a couple of points in between, and the end of the window
+        horizons = sorted({0, hours * 900, hours * 1800, hours * 3600})
+        role_index = index.role_index_for(open_slots, set(timeline.free_by(now + horizons[-1])))
+        fills = await run_cpu(forecast_fill, open_slots, timeline, role_index, horizons)
+
+        lines.append("\n**Open slots fillable:**" if open_slots else "\nNo open slots to fill.")
+        for lvl in sorted({s.level for s in open_slots}, reverse=True):
+            steps = " · ".join(
+                f"{counts[lvl][0]}/{counts[lvl][1]} {format_wait(horizon)}" for horizon, counts in fills
+            )
+            lines.append(f"Level {lvl}: {steps}")
+        await interaction.followup.send("\n".join(lines)[:1900], ephemeral=True)
 
-        members = faction_data.get("members", {})
-        current_scope = faction_data.get("crimes", {}).get("scope", 0)
-        guild = discord.utils.get(bot.guilds)
-
-        for pid, info in members.items():
-            if info.get("criminal_mission") is None:
-                player_cpr = cpr_data.get(pid)
-                if player_cpr:
-                    oc_level, scope_cost = suggest_oc(player_cpr, current_scope)
-                    if oc_level:
-                        user = None
-                        for member in guild.members:
-                            if member.name == player_cpr["Player Name"]:
-                                user = member
-                                break
-
-                        message = (
-                            f"🎯 You are eligible for **Level {oc_level} OC**.\n"
-                            f"🔗 [Join your faction's OC page](https://www.torn.com/factions.php?step=your&crimes=1)"
-                        )
-
-                        if user:
-                            try:
-                                await user.send(f"👋 Hey {player_cpr['Player Name']}!\n{message}")
-                            except discord.Forbidden:
-                                print(f"❌ Cannot DM {player_cpr['Player Name']}, DMs are closed.")
-
-                        if DISCORD_CHANNEL_ID:
-                            channel = bot.get_channel(DISCORD_CHANNEL_ID)
-                            if channel:
-                                await channel.send(f"📣 `{player_cpr['Player Name']}` qualifies for **Level {oc_level} OC**.")
-                            else:
-                                print(f"⚠️ Configured channel ID {DISCORD_CHANNEL_ID} not found in guild.")
-                        else:
-                            print("⚠️ DISCORD_CHANNEL_ID is 0 or not set. Skipping public message.")
-                    else:
-                        print(f"⚠️ {player_cpr['Player Name']} doesn't meet CPR/scope requirements.")
     except Exception as e:
-        print(f"🔥 monitor_ocs error: {e}")
+        await interaction.followup.send(f"Error building forecast: {str(e)}", ephemeral=True)
 
-keep_alive()
-bot.run(DISCORD_TOKEN)
+
+@tasks.loop(minutes=1)
+async def heartbeat():
+    torn_cache = {faction.name: faction.torn.cache.stats() for faction in factions}
+    print(f"💓 Bot is alive... Torn cache: {torn_cache} Messages: {dispatcher.stats()}")
+    # Also saved on close; this covers a crash or a kill
+    for faction in factions:
+        try:
+            await run_io(faction.save_cache)
+        except OSError as e:
+            print(f"⚠️ Could not save Torn cache for {faction.name}: {e}")
+
+# faction key -> the asyncio task running that faction's monitor loop
+monitor_tasks = {}
+
+def start_monitors():
+    for faction in factions:
+        task = monitor_tasks.get(faction.key)
+        if task is None or task.done():
+            monitor_tasks[faction.key] = asyncio.create_task(monitor_ocs(faction))
+
+async def monitor_ocs(faction):
+    # Each faction polls on its own schedule, so a slow one only delays itself
+    while True:
+        # Poll, then sleep until the scheduler's next useful moment or a refresh push
+        crimes_data = await run_monitor_cycle(faction)
+        delay = faction.scheduler.next_delay(crimes_data, faction.limiter.remaining(), faction.limiter.max_calls)
+        print(f"⏱️ Next OC check for {faction.name} in {delay:.0f}s")
+        await faction.scheduler.sleep(delay)
+
+def guild_of(faction):
+    if faction.guild_id is None:
+        return discord.utils.get(bot.guilds)
+    return bot.get_guild(faction.guild_id)
+
+async def run_monitor_cycle(faction):
+    """
+    One monitor poll. Returns the crimes,members response, which has the
+    crime list with ready_at times the scheduler plans the next poll from
+    (basic,crimes only carries the scope under "crimes").
+    """
+    crimes_data = {}
+    try:
+        print(f"🔁 monitor_ocs running for {faction.name}...")
+        faction_data = await faction.torn.get_faction_data(PRIORITY_BACKGROUND)
+        crimes_data = await faction.torn.get_crimes_data(PRIORITY_BACKGROUND, allow_stale=True)
+        if faction_data and "error" not in faction_data and not is_stale(faction_data):
+            await run_io(faction.history.record_poll, faction_data)
+        if crimes_data and "error" not in crimes_data and not is_stale(crimes_data):
+            await run_io(faction.history.record_slots, crimes_data)
+        cpr_table = await run_io(faction.load_cpr_table)
+
+        members = faction.statuses.update(faction_data.get("members", {}))
+        if not members:
+            # Don't let a failed fetch wipe the last known state
+            print(f"⚠️ monitor_ocs got no member data for {faction.name}, skipping this cycle.")
+            return crimes_data
+        # Rows the bulk data left incomplete are topped up per user, off the poll's path
+        faction.statuses.refresh_in_background()
+        current_scope = faction_data.get("crimes", {}).get("scope", 0)
+        directory = directory_for(guild_of(faction))
+
+        # Suggest levels for every idle member in one pass, within the scope budget
+        idle_ids = [m.id for m in members if not m.in_oc and m.id in cpr_table]
+        oc_levels, _ = suggest_oc_batch(cpr_table.matrix(idle_ids), current_scope, faction.oc_levels)
+
+        # Only members whose state changed since the last cycle are messaged
+        suggested = dict(zip(idle_ids, oc_levels.tolist()))
+        member_state = {
+            str(m.id): {"free": not m.in_oc, "level": suggested.get(m.id, 0)}
+            for m in members
+        }
+        events, scope_event = faction.notifier.update(member_state, current_scope)
+
+        for pid in idle_ids:
+            if not suggested[pid]:
+                print(f"⚠️ {cpr_table.name(pid)} doesn't meet CPR/scope requirements.")
+
+        digest = [scope_event] if scope_event else []
+        direct_messages = []
+        for event in events:
+            pid = int(event["pid"])
+            player_name = cpr_table.name(pid)
+            oc_level = event["level"]
+            # Display names carry the Torn ID ("name [id]"); the sheet's name only matches a username
+            user = (directory.by_torn_id.get(pid) or directory.find(player_name)) if directory else None
+
+            message = (
+                f"🎯 You are eligible for **Level {oc_level} OC**.\n"
+                f"🔗 [Join your faction's OC page](https://www.torn.com/factions.php?step=your&crimes=1)"
+            )
+
+            if user:
+                direct_messages.append((user, f"👋 Hey {player_name}!\n{message}"))
+
+            if event["kind"] == "level":
+                digest.append(f"📣 `{player_name}` now qualifies for **Level {oc_level} OC** (was {event['previous']}).")
+            else:
+                digest.append(f"📣 `{player_name}` qualifies for **Level {oc_level} OC**.")
+
+        await dispatcher.send_dms(direct_messages)
+
+        if digest:
+            if faction.channel_id:
+                channel = bot.get_channel(faction.channel_id)
+                if channel:
+                    await dispatcher.post_lines(channel, digest)
+                else:
+                    print(f"⚠️ Configured channel ID {faction.channel_id} not found in guild.")
+            else:
+                print(f"⚠️ discord_channel_id for {faction.name} is 0 or not set. Skipping public message.")
+    except Exception as e:
+        print(f"🔥 monitor_ocs error for {faction.name}: {e}")
+    return crimes_data
+
+# Optional push endpoint: POST /refresh?token=... makes monitor_ocs poll now,
+# for every faction or just the one given as &guild=<guild id>
+REFRESH_TOKEN = os.environ.get("REFRESH_TOKEN")
+
+def create_app():
+    # Imported here, on the web thread, so Flask stays off the bot's startup path
+    from flask import Flask, request
+    app = Flask('')
+
+    # Uptime pingers only need a 200; Prometheus gets the metrics from the same route
+    @app.route('/')
+    @app.route('/metrics')
+    def home():
+        return metrics.registry.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+    @app.route('/refresh', methods=['POST'])
+    def refresh():
+        token = request.args.get("token") or request.headers.get("X-Refresh-Token")
+        if not REFRESH_TOKEN or token != REFRESH_TOKEN:
+            return "Forbidden", 403
+        guild_id = request.args.get("guild")
+        targets = list(factions) if guild_id is None else [factions.get(guild_id)]
+        if None in targets:
+            return "Unknown guild.", 404
+        try:
+            for faction in targets:
+                bot.loop.call_soon_threadsafe(faction.scheduler.trigger)
+        except AttributeError:
+            return "Bot is still starting.", 503
+        return "Refresh queued."
+
+    return app
+
+if __name__ == "__main__":
+    executor.start()
+    keep_alive()
+    bot.run(DISCORD_TOKEN)
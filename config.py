@@ -0,0 +1,17 @@
+"""
+config.json, read once per process and shared by every module that
+needs a setting.
+"""
+import json
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parent / "config.json"
+
+with open(CONFIG_PATH) as f:
+    CONFIG = json.load(f)
+
+
+def save():
+    """Write CONFIG back to config.json, e.g. after /setchannel."""
+    with open(CONFIG_PATH, "w") as f:
+        json.dump(CONFIG, f, indent=4)
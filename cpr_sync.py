@@ -1,20 +1,24 @@
-import gspread
-from google.oauth2.service_account import Credentials
-import json
+from config import CONFIG
+from sheet_sync import sync
+from models import CPRTable
 
-def load_cpr_data():
-    with open("config.json") as f:
-        config = json.load(f)
+def _cpr_sheet(sheet_key, sheet_name):
+    # Defaults to the single-faction sheet from config.json
+    if sheet_key is None or sheet_name is None:
+        sheet_key = sheet_key or CONFIG['google_sheet_id']
+        sheet_name = sheet_name or CONFIG['cpr_sheet_name']
+    return sheet_key, sheet_name
 
-    scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-    creds = Credentials.from_service_account_file("google_creds.json", scopes=scopes)
-    client = gspread.authorize(creds)
-
-    sheet = client.open_by_key(config['google_sheet_id']).worksheet(config['cpr_sheet_name'])
-    data = sheet.get_all_records()
+def load_cpr_data(sheet_key=None, sheet_name=None):
+    # Served from the local snapshot unless the sheet changed upstream
+    data = sync.get_records(*_cpr_sheet(sheet_key, sheet_name))
 
     cpr_map = {}
     for row in data:
         pid = str(row.get("Player ID")).strip()
         cpr_map[pid] = row
     return cpr_map
+
+def load_cpr_table(sheet_key=None, sheet_name=None):
+    """The CPR sheet as a models.CPRTable, built straight from the raw values."""
+    return CPRTable.from_rows(sync.get_values(*_cpr_sheet(sheet_key, sheet_name)))
@@ -0,0 +1,112 @@
+import asyncio
+import discord
+import metrics
+from notifier import digest_messages
+
+# DMs in flight at once; each needs its own DM channel, which is a shared route
+MAX_CONCURRENT_DMS = 5
+# Attempts after the first for server errors or rate limits discord.py gave up on
+RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+# Embed descriptions allow 4096 characters; keep pages readable
+EMBED_PAGE_LIMIT = 3800
+
+
+class MessageDispatcher:
+    """
+    Outbound Discord messages. DMs go out concurrently, channel posts are
+    packed into as few messages or embeds as possible, and failed sends
+    are retried with backoff. Counters show what happened to each message.
+    """
+
+    def __init__(self, max_concurrent_dms=MAX_CONCURRENT_DMS, retries=RETRIES, base_delay=RETRY_BASE_DELAY):
+        self.retries = retries
+        self.base_delay = base_delay
+        self._dm_slots = asyncio.Semaphore(max_concurrent_dms)
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.retried = 0
+
+    def stats(self):
+        return {"sent": self.sent, "coalesced": self.coalesced, "dropped": self.dropped, "retried": self.retried}
+
+    async def send(self, target, content=None, **kwargs):
+        """Send one message, retrying transient failures. Returns the message or None."""
+        kind = "dm" if isinstance(target, discord.abc.User) else "channel"
+        with metrics.DISCORD_SEND_SECONDS.time(target=kind) as labels:
+            message = await self._send(target, kind, content, **kwargs)
+            labels["result"] = "sent" if message is not None else "dropped"
+        return message
+
+    async def _send(self, target, kind, content, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                message = await target.send(content, **kwargs)
+                self.sent += 1
+                return message
+            except discord.Forbidden:
+                print(f"❌ Cannot message {target}, DMs are closed or access is denied.")
+                break
+            except discord.RateLimited as e:
+                # discord.py already waits out normal 429s; this is a long one
+                delay = e.retry_after
+            except discord.HTTPException as e:
+                if e.status < 500:
+                    print(f"❌ Discord rejected message to {target}: {e}")
+                    break
+                delay = self.base_delay * 2 ** attempt
+            if attempt < self.retries:
+                self.retried += 1
+                metrics.DISCORD_RETRIES.inc(target=kind)
+                await asyncio.sleep(delay)
+        self.dropped += 1
+        return None
+
+    async def send_dms(self, messages):
+        """messages: [(user, content), ...], sent concurrently."""
+        async def dm(user, content):
+            async with self._dm_slots:
+                return await self.send(user, content)
+
+        return await asyncio.gather(*(dm(user, content) for user, content in messages))
+
+    async def post_lines(self, channel, lines):
+        """Post lines to a channel packed into as few messages as fit."""
+        messages = digest_messages(lines)
+        self.coalesced += len(lines) - len(messages)
+        return [await self.send(channel, text) for text in messages]
+
+    async def post_pages(self, channel, title, pages, view_for_page=None):
+        """
+        Post one embed per page of lines, numbered "title (1/3)".
+        view_for_page(page_index) may return a View to attach.
+        """
+        total = len(pages)
+        self.coalesced += sum(len(page) for page in pages) - total
+        posted = []
+        for i, page in enumerate(pages):
+            embed = discord.Embed(title=f"{title} ({i + 1}/{total})", description="\n".join(page))
+            view = view_for_page(i) if view_for_page else None
+            kwargs = {"embed": embed}
+            if view is not None:
+                kwargs["view"] = view
+            posted.append(await self.send(channel, **kwargs))
+        return posted
+
+
+def paginate(lines, per_page, limit=EMBED_PAGE_LIMIT):
+    """Split lines into pages of at most per_page lines and limit characters."""
+    pages = []
+    page = []
+    size = 0
+    for line in lines:
+        if page and (len(page) >= per_page or size + len(line) + 1 > limit):
+            pages.append(page)
+            page = []
+            size = 0
+        page.append(line)
+        size += len(line) + 1
+    if page:
+        pages.append(page)
+    return pages
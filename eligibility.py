@@ -0,0 +1,184 @@
+from bisect import bisect_left
+from executor import run_io, run_cpu
+from models import Interner, CrimeRole, OpenSlot, normalize_role
+
+CPR_SHEET = 'Member_CPR'
+CRIME_SHEET = 'Crime&Position'
+
+# How many of the hardest roles per crime count towards "fill" suggestions
+TOP_ROLES_PER_CRIME = 3
+
+
+def _to_int(value):
+    return int(value) if value.isdigit() else 0
+
+
+class EligibilityIndex:
+    """
+    Who can fill what, built once from the Member_CPR and Crime&Position
+    sheets. Crime names and normalized role names are interned, so a slot
+    is the int pair (crime id, role id) and lookups never re-lowercase.
+
+    by_slot:   (crime, role) -> (cprs ascending, member ids in the same order)
+    by_member: member id -> {(crime, role): cpr}
+    """
+
+    def __init__(self, cpr_rows, crime_rows):
+        self.crimes = Interner()
+        self.roles = Interner()
+        self.names = {}
+        self.by_member = {}
+        self.requirements = {}   # (crime, role) -> CrimeRole
+        self.crime_levels = {}   # crime -> level
+
+        self._parse_crimes(crime_rows)
+        self._parse_cpr(cpr_rows)
+
+        by_slot = {}
+        for member_id, slots in self.by_member.items():
+            for key, cpr in slots.items():
+                by_slot.setdefault(key, []).append((cpr, member_id))
+        self.by_slot = {}
+        for key, entries in by_slot.items():
+            entries.sort()
+            self.by_slot[key] = ([c for c, _ in entries], [m for _, m in entries])
+
+        self.level_qualifiers = self._level_qualifiers()
+        self._role_index = None
+        self._last_role_index_for = None   # (slot requirements, available_ids, result) of the last call
+
+    def _parse_crimes(self, crime_rows):
+        for row in crime_rows:
+            if len(row) < 19:
+                continue
+            oc_name = row[12]
+            if not oc_name:
+                continue
+            level = _to_int(row[13])
+            crime, role = self.crimes.id(oc_name), self.roles.id(normalize_role(row[14]))
+            self.requirements[(crime, role)] = CrimeRole(crime, role, level, _to_int(row[18]), row[17])
+            self.crime_levels.setdefault(crime, level)
+
+    def _parse_cpr(self, cpr_rows):
+        if len(cpr_rows) < 3:
+            return
+        headers, _, roles = cpr_rows[0], cpr_rows[1], cpr_rows[2]
+        columns = [
+            (idx, (self.crimes.id(headers[idx]), self.roles.id(normalize_role(roles[idx]))))
+            for idx in range(3, len(headers))
+            if headers[idx]
+        ]
+        for row in cpr_rows[3:]:
+            player_id = _to_int(row[1].strip()) if len(row) > 1 else 0
+            if not player_id:
+                continue
+            self.names[player_id] = row[0]
+            self.by_member[player_id] = {
+                key: _to_int(row[idx]) for idx, key in columns if idx < len(row)
+            }
+
+    def _level_qualifiers(self):
+        # Members who meet the CPR of one of the hardest roles at each level
+        per_crime = {}
+        for key, requirement in self.requirements.items():
+            per_crime.setdefault(requirement.crime, []).append((requirement.required_cpr, key, requirement.level))
+        qualifiers = {}
+        for roles in per_crime.values():
+            for required, key, level in sorted(roles, reverse=True)[:TOP_ROLES_PER_CRIME]:
+                found = qualifiers.setdefault(level, set())
+                found.update(m for m, _ in self._members_for(key, required))
+        return qualifiers
+
+    def key(self, crime, role):
+        """(crime id, role id) for a crime name and role name; None parts if unknown."""
+        return self.crimes.get(crime), self.roles.get(normalize_role(role))
+
+    def _members_for(self, key, min_cpr):
+        cprs, members = self.by_slot.get(key, ((), ()))
+        start = bisect_left(cprs, min_cpr)
+        return [(members[i], cprs[i]) for i in range(len(cprs) - 1, start - 1, -1)]
+
+    def members_for(self, crime, role, min_cpr=0):
+        """Members with at least `min_cpr` in this slot, best CPR first."""
+        return self._members_for(self.key(crime, role), min_cpr)
+
+    def slots_for(self, member_id):
+        return self.by_member.get(member_id, {})
+
+    def cpr(self, member_id, crime, role):
+        return self.by_member.get(member_id, {}).get(self.key(crime, role), 0)
+
+    def crime_level(self, crime):
+        return self.crime_levels.get(self.crimes.get(crime), 0)
+
+    def open_slots(self, crimes):
+        """OpenSlot for every empty slot in Torn's crimes list, keyed with this index's IDs."""
+        slots = []
+        for c in crimes:
+            crime = self.crimes.get(c["name"])
+            level = self.crime_levels.get(crime, 0)
+            for slot in c.get("slots", []):
+                if slot.get("user") is None:
+                    slots.append(OpenSlot(
+                        crime, self.roles.get(normalize_role(slot["position"])), c["name"],
+                        slot["position"], level, slot.get("checkpoint_pass_rate", 0),
+                    ))
+        return slots
+
+    def role_index(self):
+        """{(crime, role): {member_id: cpr}} as used by oc_matching.assign_slots."""
+        if self._role_index is None:
+            self._role_index = {key: dict(zip(members, cprs)) for key, (cprs, members) in self.by_slot.items()}
+        return self._role_index
+
+    def role_index_for(self, slots, available_ids):
+        """
+        role_index() cut down to what matching these slots can use: their
+        (crime, role) keys, members in available_ids, CPRs that meet the
+        slot's requirement. Much smaller to send to a worker process.
+        Concurrent commands on the same Torn response ask for the same one,
+        so the last result is kept.
+        """
+        required = {}
+        for slot in slots:
+            required[slot.key] = min(required.get(slot.key, slot.required_cpr), slot.required_cpr)
+        last = self._last_role_index_for
+        if last is not None and last[0] == required and last[1] == available_ids:
+            return last[2]
+        index = {}
+        for key, min_cpr in required.items():
+            cprs, members = self.by_slot.get(key, ((), ()))
+            # Ascending CPR, like role_index(), so matching breaks ties the same way
+            index[key] = {
+                members[i]: cprs[i]
+                for i in range(bisect_left(cprs, min_cpr), len(cprs))
+                if members[i] in available_ids
+            }
+        self._last_role_index_for = (required, frozenset(available_ids), index)
+        return index
+
+    def level_fill_counts(self, available_ids):
+        counts = {}
+        for level, members in self.level_qualifiers.items():
+            count = len(members & available_ids)
+            if count:
+                counts[level] = count
+        return counts
+
+
+_indexes = {}
+
+async def load_index(sheets, sheet_key):
+    """
+    Return the index for a spreadsheet, rebuilding it only when one of the
+    two source worksheets has been re-downloaded. Sheet reads run on the
+    I/O pool and the rebuild in a worker process.
+    """
+    cpr_rows = await run_io(sheets.get_values, sheet_key, CPR_SHEET)
+    crime_rows = await run_io(sheets.get_values, sheet_key, CRIME_SHEET)
+    version = (sheets.version(sheet_key, CPR_SHEET), sheets.version(sheet_key, CRIME_SHEET))
+    cached = _indexes.get(sheet_key)
+    if cached is None or cached[0] != version:
+        cached = (version, await run_cpu(EligibilityIndex, cpr_rows, crime_rows))
+        _indexes[sheet_key] = cached
+    return cached[1]
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import metrics
+
+# Blocking Sheets/Drive calls; gspread spends its time waiting on HTTP
+IO_WORKERS = 4
+# Row parsing and assignment solving, off the event loop's GIL
+CPU_WORKERS = 2
+
+_io_pool = None
+_cpu_pool = None
+
+
+def _cpu_context():
+    # Spawned children re-import the main module, and bot.py's top level
+    # builds every faction and opens their databases: fork where
+    # available, spawn elsewhere
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+
+def io_pool():
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="sheets-io")
+    return _io_pool
+
+
+def cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=_cpu_context())
+    return _cpu_pool
+
+
+def start():
+    """
+    Fork the CPU workers now, before the bot starts any threads, rather
+    than on first use.
+    """
+    for future in [cpu_pool().submit(int) for _ in range(CPU_WORKERS)]:
+        future.result()
+
+
+def _name(fn):
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O call on the bounded thread pool."""
+    loop = asyncio.get_running_loop()
+    with metrics.span(f"run_io {_name(fn)}"):
+        return await loop.run_in_executor(io_pool(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a CPU-heavy function in a worker process. fn and its arguments
+    must be picklable (module-level functions, plain data).
+    """
+    loop = asyncio.get_running_loop()
+    pool = cpu_pool()
+    with metrics.span(f"run_cpu {_name(fn)}"):
+        try:
+            return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory) and took the pool with it;
+            # the next call gets a fresh one instead of failing until a restart
+            _reset_cpu_pool(pool)
+            raise
+
+
+def _reset_cpu_pool(broken):
+    global _cpu_pool
+    if _cpu_pool is broken:
+        print("⚠️ A CPU worker died, starting a new process pool.")
+        _cpu_pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown():
+    global _io_pool, _cpu_pool
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
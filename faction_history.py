@@ -0,0 +1,192 @@
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from models import iter_members, member_in_oc
+
+BASE_DIR = Path(__file__).resolve().parent
+HISTORY_DB = BASE_DIR / "faction_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS polls (
+    ts           INTEGER PRIMARY KEY,
+    faction_name TEXT,
+    scope        INTEGER
+);
+-- Member and balance rows are only written when a value changes, so a
+-- member who sits idle for a week costs one row, not 2000
+CREATE TABLE IF NOT EXISTS member_states (
+    member_id   INTEGER NOT NULL,
+    ts          INTEGER NOT NULL,
+    in_oc       INTEGER NOT NULL,
+    status      TEXT,
+    PRIMARY KEY (member_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS balances (
+    member_id   INTEGER NOT NULL,
+    ts          INTEGER NOT NULL,
+    money       INTEGER NOT NULL,
+    points      INTEGER NOT NULL,
+    PRIMARY KEY (member_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS oc_slots (
+    ts          INTEGER NOT NULL,
+    crime_id    INTEGER NOT NULL,
+    crime_name  TEXT,
+    position    TEXT,
+    user_id     INTEGER,
+    ready_at    INTEGER
+);
+CREATE INDEX IF NOT EXISTS oc_slots_ts ON oc_slots (ts);
+"""
+
+
+class FactionHistory:
+    """
+    Time-series record of what each poll saw: scope, member OC state,
+    balances and open/filled OC slots. SQLite in WAL mode so reads don't
+    wait on the monitor loop's writes.
+    """
+
+    def __init__(self, path=HISTORY_DB, clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        # Last written values, so unchanged members and balances are skipped
+        self._member_state = dict(
+            (row[0], row[1:]) for row in self._db.execute("""
+                SELECT member_id, in_oc, status FROM member_states m
+                WHERE ts = (SELECT MAX(ts) FROM member_states WHERE member_id = m.member_id)
+            """)
+        )
+        self._slots = None
+        self._balances = dict(
+            (row[0], row[1:]) for row in self._db.execute("""
+                SELECT member_id, money, points FROM balances b
+                WHERE ts = (SELECT MAX(ts) FROM balances WHERE member_id = b.member_id)
+            """)
+        )
+
+    def _now(self, ts):
+        return int(self.clock() if ts is None else ts)
+
+    def record_poll(self, faction_data, ts=None):
+        ts = self._now(ts)
+        crimes = faction_data.get("crimes", {})
+        scope = crimes.get("scope") if isinstance(crimes, dict) else None
+
+        member_rows = []
+        for member_id, info in iter_members(faction_data.get("members", {})):
+            status = info.get("status", {})
+            state = (int(member_in_oc(info)), status.get("state") if isinstance(status, dict) else status)
+            if self._member_state.get(member_id) != state:
+                self._member_state[member_id] = state
+                member_rows.append((member_id, ts) + state)
+
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO polls VALUES (?, ?, ?)", (ts, faction_data.get("name"), scope))
+            self._db.executemany("INSERT OR REPLACE INTO member_states VALUES (?, ?, ?, ?)", member_rows)
+            self._db.commit()
+
+    def record_slots(self, crimes_data, ts=None):
+        """
+        The OC slots in a crimes,members response; basic,crimes (what
+        record_poll gets) only has the scope under "crimes".
+        """
+        ts = self._now(ts)
+        slot_rows = []
+        for crime in crimes_data.get("crimes", []):
+            for slot in crime.get("slots", []):
+                user = slot.get("user") or {}
+                slot_rows.append((crime.get("id", 0), crime.get("name"), slot.get("position"),
+                                  user.get("id"), crime.get("ready_at")))
+        # Slots are stored as a full snapshot, but only when they changed
+        if slot_rows == self._slots:
+            return
+        self._slots = slot_rows
+        with self._lock:
+            self._db.executemany("INSERT INTO oc_slots VALUES (?, ?, ?, ?, ?, ?)", [(ts,) + r for r in slot_rows])
+            self._db.commit()
+
+    def record_balances(self, balance_data, ts=None):
+        ts = self._now(ts)
+        rows = []
+        for m in balance_data.get("balance", {}).get("members", []):
+            value = (int(m.get("money", 0)), int(m.get("points", 0)))
+            if self._balances.get(m["id"]) != value:
+                self._balances[m["id"]] = value
+                rows.append((m["id"], ts) + value)
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO balances VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def latest_poll(self):
+        """(ts, faction_name, scope) of the most recent poll, or None."""
+        rows = self._query("SELECT ts, faction_name, scope FROM polls ORDER BY ts DESC LIMIT 1", ())
+        return rows[0] if rows else None
+
+    def balance_at(self, member_id, ts=None):
+        """(money, points) as of time ts (default now), or None if never seen."""
+        rows = self._query(
+            "SELECT money, points FROM balances WHERE member_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+            (member_id, self._now(ts)),
+        )
+        return rows[0] if rows else None
+
+    def slots_at(self, ts=None):
+        """OC slots as of time ts: [(crime_id, crime_name, position, user_id, ready_at), ...]."""
+        return self._query("""
+            SELECT crime_id, crime_name, position, user_id, ready_at FROM oc_slots
+            WHERE ts = (SELECT MAX(ts) FROM oc_slots WHERE ts <= ?)
+        """, (self._now(ts),))
+
+    def members_at(self, ts=None):
+        """{member_id: in_oc} for every member recorded as of time ts."""
+        return dict(self._query("""
+            SELECT member_id, in_oc FROM member_states m
+            WHERE ts = (SELECT MAX(ts) FROM member_states WHERE member_id = m.member_id AND ts <= ?)
+        """, (self._now(ts),)))
+
+    def scope_trend(self, since, until=None):
+        """[(ts, scope), ...] for polls in the window, oldest first."""
+        return self._query(
+            "SELECT ts, scope FROM polls WHERE ts >= ? AND ts <= ? ORDER BY ts",
+            (int(since), self._now(until)),
+        )
+
+    def availability(self, member_id, since, until=None):
+        """
+        Fraction of [since, until] the member spent outside an OC, from the
+        recorded state changes. None if nothing is known for the window.
+        """
+        since, until = int(since), self._now(until)
+        before = self._query(
+            "SELECT ts, in_oc FROM member_states WHERE member_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+            (member_id, since),
+        )
+        changes = self._query(
+            "SELECT ts, in_oc FROM member_states WHERE member_id = ? AND ts > ? AND ts <= ? ORDER BY ts",
+            (member_id, since, until),
+        )
+        if not before and not changes:
+            return None
+
+        # Time before the first known state isn't counted either way
+        start, in_oc = (since, before[0][1]) if before else changes[0]
+        free = 0
+        for ts, state in changes:
+            if not in_oc:
+                free += ts - start
+            start, in_oc = max(ts, start), state
+        if not in_oc:
+            free += until - start
+        known = until - (since if before else changes[0][0])
+        return free / known if known > 0 else None
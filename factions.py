@@ -0,0 +1,180 @@
+import os
+from pathlib import Path
+import torn_api
+from torn_api import TornClient
+from api_limiter import APILimiter
+from sheet_sync import sync
+from cpr_sync import load_cpr_table
+from ledger import LedgerProcessor
+from member_status import MemberStatuses
+from oc_assignment import OC_LEVELS
+from notifier import ChangeNotifier, SCOPE_THRESHOLDS
+from faction_history import FactionHistory
+from scheduler import AdaptiveScheduler, MIN_INTERVAL, MAX_INTERVAL
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_OC_SHEET = '15Ef4fK0cZH9xeUIwb0SjCj_SYf-wqvrp09qC6IneX7E'
+# Torn's documented limit, per key
+CALLS_PER_MINUTE = 80
+
+
+class Faction:
+    """
+    One faction and the Discord guild it answers in: its Torn key(s),
+    rate limiter and response cache, its sheets, alert channel and monitor
+    state. Nothing here is shared with other factions, so one faction can
+    neither use up another's API budget nor be served its cached data.
+    The exception is factions on the same Torn key(s): Torn limits calls
+    per key, so they share one rate limiter from `limiters`.
+
+    settings is this faction's block of config.json; anything it leaves
+    out falls back to the top-level value in defaults.
+    """
+
+    def __init__(self, key, settings, defaults, guild_id=None, client=None, limiters=None):
+        self.key = key
+        self.guild_id = guild_id
+        self.settings = settings
+
+        def setting(name, fallback=None):
+            return settings.get(name, defaults.get(name, fallback))
+
+        self.name = setting("name", key)
+        if client is None:
+            keys = _api_keys(settings.get("torn_api_key_env"))
+            if not keys:
+                raise ValueError(f"No Torn API key found for faction {self.name}!")
+            limiter = _shared_limiter(
+                {} if limiters is None else limiters, keys, setting("torn_calls_per_minute", CALLS_PER_MINUTE),
+            )
+            client = TornClient(limiter, name=self.name)
+        self.torn = client
+        self.limiter = client.limiter
+        self.statuses = MemberStatuses(client)
+
+        self.oc_sheet_key = setting("oc_sheet_id", DEFAULT_OC_SHEET)
+        self.cpr_sheet_key = setting("google_sheet_id")
+        self.cpr_sheet_name = setting("cpr_sheet_name")
+        self.channel_id = int(settings.get("discord_channel_id", 0))
+        self.oc_levels = setting("oc_levels", OC_LEVELS)
+
+        # The default faction keeps the file names it had before guilds existed
+        suffix = "" if guild_id is None else f"_{guild_id}"
+        self.history = FactionHistory(BASE_DIR / f"faction_history{suffix}.db")
+        self.notifier = ChangeNotifier(
+            BASE_DIR / f"monitor_state{suffix}.json",
+            setting("scope_thresholds", SCOPE_THRESHOLDS),
+        )
+        self.cache_file = BASE_DIR / f"torn_cache{suffix}.json"
+        self.ledger = LedgerProcessor(sync, self.oc_sheet_key, path=BASE_DIR / f"ledger_state{suffix}.json")
+        self.scheduler = AdaptiveScheduler(
+            min_interval=setting("monitor_min_interval", MIN_INTERVAL),
+            max_interval=setting("monitor_max_interval", MAX_INTERVAL),
+        )
+
+    def __repr__(self):
+        return f"<Faction {self.name} guild={self.guild_id}>"
+
+    def set_channel(self, channel_id):
+        """Point OC alerts at channel_id. The caller saves config.json."""
+        self.channel_id = channel_id
+        self.settings["discord_channel_id"] = str(channel_id)
+
+    def load_cpr_table(self):
+        return load_cpr_table(self.cpr_sheet_key, self.cpr_sheet_name)
+
+    def restore_cache(self):
+        """Load the Torn responses saved by save_cache() before the last shutdown."""
+        return self.torn.cache.restore(self.cache_file)
+
+    def save_cache(self):
+        return self.torn.cache.save(self.cache_file)
+
+    async def close(self):
+        try:
+            self.save_cache()
+        except OSError as e:
+            print(f"⚠️ Could not save Torn cache for {self.name}: {e}")
+        await self.torn.close()
+
+
+def _api_keys(env_name):
+    if env_name is None:
+        return torn_api.API_KEYS
+    return [k.strip() for k in os.environ.get(env_name, "").split(",") if k.strip()]
+
+
+def _shared_limiter(limiters, keys, calls_per_minute):
+    """The APILimiter for this set of keys, shared by every faction using exactly those keys."""
+    key_set = frozenset(keys)
+    limiter = limiters.get(key_set)
+    if limiter is None:
+        if any(other & key_set for other in limiters):
+            # A key in two different sets would get both sets' budgets
+            raise ValueError("Factions that share a Torn API key must use the same set of keys.")
+        limiter = limiters[key_set] = APILimiter(calls_per_minute, keys=keys)
+    return limiter
+
+
+class FactionRegistry:
+    """
+    The factions this process serves, looked up by Discord guild.
+
+    With a "guilds" block in config.json every listed guild is its own
+    faction:
+
+        "guilds": {
+            "<guild id>": {
+                "name": "...",
+                "torn_api_key_env": "TORN_API_KEY_<NAME>",
+                "oc_sheet_id": "...",
+                "google_sheet_id": "...",
+                "cpr_sheet_name": "...",
+                "discord_channel_id": "..."
+            }
+        }
+
+    torn_api_key_env names the secret holding that faction's key (or
+    comma-separated keys). A guild without one uses TORN_API_KEYS, and
+    every faction on the same key(s) shares one rate limit budget.
+    Without a "guilds" block there is one faction
+    configured from the top level of config.json and TORN_API_KEY, and it
+    answers in every guild, as before.
+    """
+
+    def __init__(self, config):
+        self.by_guild = {}
+        self.default = None
+        # frozenset of Torn keys -> the APILimiter every faction on them shares
+        self.limiters = {}
+        guilds = config.get("guilds")
+        if guilds:
+            for guild_id, settings in guilds.items():
+                self.by_guild[int(guild_id)] = Faction(
+                    str(guild_id), settings, config, guild_id=int(guild_id), limiters=self.limiters,
+                )
+        else:
+            if not torn_api.API_KEYS:
+                raise ValueError("TORN_API_KEY not found in Secrets!")
+            self.default = Faction("default", config, config, client=torn_api.client)
+
+    def __iter__(self):
+        if self.default is not None:
+            yield self.default
+        yield from self.by_guild.values()
+
+    def __len__(self):
+        return len(self.by_guild) + (self.default is not None)
+
+    def for_guild(self, guild):
+        if guild is not None and guild.id in self.by_guild:
+            return self.by_guild[guild.id]
+        return self.default
+
+    def get(self, key):
+        return next((f for f in self if f.key == key), None)
+
+    async def close(self):
+        for faction in self:
+            await faction.close()
@@ -0,0 +1,101 @@
+"""
+In-memory stand-in for the parts of gspread the bot uses, for running
+sheet code offline:
+
+    client = FakeClient({"sheet-key": {"Member_CPR": [[...], ...]}})
+    sheets = SheetSync(store=SnapshotStore(":memory:"), client=client)
+"""
+import itertools
+from gspread.utils import a1_to_rowcol
+
+_revisions = itertools.count(1)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.rows = [list(r) for r in rows]
+        self.calls = 0
+
+    def get_all_values(self):
+        self.calls += 1
+        return [list(r) for r in self.rows]
+
+    def _read(self, range_name):
+        # Like the Sheets API: trailing empty cells and rows are left out
+        start, _, end = range_name.partition(":")
+        start_row, start_col = a1_to_rowcol(start)
+        if not end:
+            end_row, end_col = start_row, start_col
+        elif end.isalpha():
+            # Open-ended, e.g. "A10:AF": down to the last row
+            end_row, end_col = len(self.rows), a1_to_rowcol(f"{end}1")[1]
+        else:
+            end_row, end_col = a1_to_rowcol(end)
+        rows = []
+        for row in self.rows[start_row - 1:end_row]:
+            cells = list(row[start_col - 1:end_col])
+            while cells and cells[-1] == "":
+                cells.pop()
+            rows.append(cells)
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    def get(self, range_name):
+        self.calls += 1
+        return self._read(range_name)
+
+    def batch_get(self, ranges):
+        self.calls += 1
+        return [self._read(r) for r in ranges]
+
+    def _write(self, range_name, values):
+        start_row, start_col = a1_to_rowcol(range_name.split(":")[0])
+        for r, line in enumerate(values):
+            row = start_row + r
+            while len(self.rows) < row:
+                self.rows.append([])
+            cells = self.rows[row - 1]
+            for c, value in enumerate(line):
+                col = start_col + c
+                while len(cells) < col:
+                    cells.append("")
+                cells[col - 1] = str(value)
+
+    def update(self, range_name, values):
+        self.calls += 1
+        self._write(range_name, values)
+        self.spreadsheet.touch()
+
+    def batch_update(self, data):
+        self.calls += 1
+        for item in data:
+            self._write(item["range"], item["values"])
+        self.spreadsheet.touch()
+
+
+class FakeSpreadsheet:
+    def __init__(self, key, worksheets):
+        self.id = key
+        self.revision = next(_revisions)
+        self._worksheets = {name: FakeWorksheet(self, name, rows) for name, rows in worksheets.items()}
+
+    def touch(self):
+        self.revision = next(_revisions)
+
+    def worksheet(self, name):
+        return self._worksheets[name]
+
+    def get_lastUpdateTime(self):
+        return f"rev-{self.revision}"
+
+
+class FakeClient:
+    def __init__(self, sheets):
+        self.sheets = {key: FakeSpreadsheet(key, ws) for key, ws in sheets.items()}
+
+    def open_by_key(self, key):
+        return self.sheets[key]
+
@@ -0,0 +1,100 @@
+"""
+When members come free, built in one pass over Torn's crimes list and
+the member table: member -> the crime they're in -> its ready_at. Active
+members are kept sorted by the time they're free, so "who is free within
+N hours" is a bisect rather than a scan over every crime's slots.
+"""
+from bisect import bisect_right
+from oc_matching import assign_slots
+
+# Members whose last action is older than this aren't counted at all
+ACTIVE_WITHIN = 86400
+# Members whose crime is ready within this many seconds count as available now
+READY_SOON = 7200
+
+
+class Timeline:
+    """
+    free_at:  member id -> when they're next free (now if idle, else
+              their crime's ready_at)
+    crime_of: member id -> name of the crime they're in
+    times/ids: active members sorted by free_at, for the queries below
+
+    Members in a crime Torn didn't list, or in one still recruiting (no
+    ready_at yet, so it can't end before it fills), have no known free
+    time and are left out, as /oc_assignments always has.
+    """
+
+    def __init__(self, crimes, members, now):
+        self.now = now
+        self.names = {}
+        self.crime_of = {}
+        self.free_at = {}
+
+        ready_at = {}
+        for c in crimes:
+            # None while the crime is still recruiting: its members stay unknown
+            ready = c.get("ready_at")
+            for slot in c.get("slots", []):
+                user = slot.get("user")
+                if user:
+                    self.crime_of[user.get("id")] = c.get("name", "")
+                    if ready:
+                        ready_at[user.get("id")] = int(ready)
+
+        for m in members:
+            self.names[m.id] = m.name
+            if now - m.last_action > ACTIVE_WITHIN:
+                continue
+            if not m.in_oc:
+                self.free_at[m.id] = now
+            elif m.id in ready_at:
+                self.free_at[m.id] = max(now, ready_at[m.id])
+
+        order = sorted(self.free_at.items(), key=lambda item: item[1])
+        self.ids = [member_id for member_id, _ in order]
+        self.times = [t for _, t in order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def free_by(self, t):
+        """Active members free at time t, soonest first."""
+        return self.ids[:bisect_right(self.times, t)]
+
+    def free_within(self, seconds):
+        """(member id, free_at) for members free within `seconds` from now, soonest first."""
+        end = bisect_right(self.times, self.now + seconds)
+        return list(zip(self.ids[:end], self.times[:end]))
+
+    def available(self, soon=READY_SOON):
+        """Who /oc_assignments may place: idle, or in a crime ready within `soon` seconds."""
+        return set(self.free_by(self.now + soon))
+
+
+def fillable_slots(open_slots, available_ids, role_index):
+    """
+    {level: (slots that can be filled, open slots)} when only available_ids
+    are used, from one maximum matching across every level.
+    """
+    matched = assign_slots(open_slots, available_ids, role_index)
+    counts = {}
+    for slot in open_slots:
+        filled, total = counts.get(slot.level, (0, 0))
+        counts[slot.level] = (filled, total + 1)
+    for slot, _, _ in matched:
+        filled, total = counts[slot.level]
+        counts[slot.level] = (filled + 1, total)
+    return counts
+
+
+def forecast_fill(open_slots, timeline, role_index, horizons):
+    """
+    fillable_slots() for each horizon in seconds from now: how many open
+    slots per level could be filled by members free by then.
+    Returns [(horizon, {level: (filled, open)}), ...].
+    """
+    return [
+        (horizon, fillable_slots(open_slots, set(timeline.free_by(timeline.now + horizon)), role_index))
+        for horizon in horizons
+    ]
@@ -0,0 +1,296 @@
+import os
+import re
+import json
+import zlib
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_FILE = BASE_DIR / "ledger_state.json"
+
+DELINQUENTS_SHEET = 'Delinquents'
+# Columns A:AF; parsing reads up to the To IDs in AF
+LEDGER_WIDTH = 32
+LAST_COLUMN = "AF"
+# Rows per range read when catching up with new ledger rows
+CHUNK_ROWS = 500
+# Sheet row of the first transfer, below the header
+FIRST_ROW = 2
+
+_NON_DIGITS = re.compile(r'[^\d]')
+
+
+def _amount(raw):
+    return int(_NON_DIGITS.sub('', raw))
+
+
+def _link(torn_id, amount):
+    return f"https://www.torn.com/factions.php?step=your/tab=controls&option=give-to-user&giveMoneyTo={torn_id}&money={amount}"
+
+
+def pad(row):
+    # The Sheets API drops trailing empty cells
+    return row + [""] * (LEDGER_WIDTH - len(row)) if len(row) < LEDGER_WIDTH else row
+
+
+def is_outstanding(row):
+    """Not marked complete, with a From amount and ID."""
+    return len(row) >= LEDGER_WIDTH and not row[24].strip() and bool(row[28] and row[29])
+
+
+def outstanding(rows):
+    """(index, row) pairs that still owe a transfer."""
+    return ((idx, row) for idx, row in rows if is_outstanding(row))
+
+
+def parse_row(idx, row):
+    """The transfers owed by one outstanding ledger row."""
+    from_amount_raw, from_id, to_amount_raw, to_ids_raw = row[28], row[29], row[30], row[31]
+    try:
+        from_amount = _amount(from_amount_raw)
+    except Exception as e:
+        print(f"Error parsing from: {e}")
+        return []
+    # "index" tells the row's transfers apart: 0 is the From, then one per To ID
+    transfers = [{"row": idx, "index": 0, "line": f"💥 From ID {from_id}: [${from_amount:,}]({_link(from_id, from_amount)})"}]
+
+    try:
+        to_amount = _amount(to_amount_raw)
+        for index, to_id in enumerate(to_ids_raw.split(), start=1):
+            transfers.append({"row": idx, "index": index, "line": f"💸 To ID {to_id}: [${to_amount:,}]({_link(to_id, to_amount)})"})
+    except Exception as e:
+        print(f"Error parsing to: {e}")
+    return transfers
+
+
+def iter_transfers(rows):
+    """Generator pipeline: (index, row) pairs -> outstanding rows -> transfers."""
+    for idx, row in outstanding(rows):
+        yield from parse_row(idx, row)
+
+
+def parse_transfers(records):
+    """
+    Outstanding transfers in the Delinquents sheet (rows after the header).
+    Returns [{"row": index into records, "index": transfer within the row,
+    "line": text for the embed}, ...].
+    """
+    return list(iter_transfers(enumerate(records)))
+
+
+def iter_chunks(worksheet, start_row, chunk_rows=CHUNK_ROWS):
+    """
+    (first sheet row, rows) for each range read from start_row down to the
+    last filled row of the sheet.
+    """
+    first = start_row
+    while True:
+        rows = worksheet.get(f"A{first}:{LAST_COLUMN}{first + chunk_rows - 1}")
+        if rows:
+            yield first, [pad(list(r)) for r in rows]
+        if len(rows) < chunk_rows:
+            break
+        first += chunk_rows
+    # The Sheets API leaves out trailing empty rows, so a short range may only
+    # have ended on blank rows: one open-ended read gets whatever is below
+    rest = worksheet.get(f"A{first + chunk_rows}:{LAST_COLUMN}")
+    if rest:
+        yield first + chunk_rows, [pad(list(r)) for r in rest]
+
+
+def _digest(row):
+    # Only the transfer columns: marking a row complete shouldn't look like rows moving
+    return zlib.crc32("\x1f".join(row[28:LEDGER_WIDTH]).encode())
+
+
+class LedgerProcessor:
+    """
+    Incremental reader for the Delinquents sheet. Instead of downloading
+    the whole ledger on every /delinquents, it keeps (on disk):
+
+    - a cursor: the next sheet row it hasn't read, plus a digest of the
+      row before it, to notice rows being inserted or deleted above;
+    - the rows that were still open. On every revision change the
+      completion and transfer columns (Y, AC:AF) of every row above the
+      cursor are re-read in one batch_get, which catches completions,
+      edits, rows filled in after they were first read and completed rows
+      reopened by clearing Y;
+    - which open rows already have a live message with buttons, so a
+      repeat /delinquents only posts what's new;
+    - which transfers of an open row officers have handled from their
+      buttons. A row stops being tracked once all of them are, or once the
+      sheet no longer lists it as outstanding.
+
+    Nothing is read while the spreadsheet's revision is unchanged. Sheet
+    reads are blocking; call update() through run_io. With path=None the
+    state only lives in memory.
+    """
+
+    def __init__(self, sheets, sheet_key, worksheet=DELINQUENTS_SHEET, path=STATE_FILE, chunk_rows=CHUNK_ROWS):
+        self.sheets = sheets
+        self.sheet_key = sheet_key
+        self.worksheet_name = worksheet
+        self.path = Path(path) if path is not None else None
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.revision = None
+        self.next_row = FIRST_ROW
+        self.anchor = None      # digest of row next_row - 1, see _digest
+        self.open = {}          # sheet row -> row values, for rows still owing transfers
+        self.posted = {}        # sheet row -> message id showing its buttons
+        self.done = {}          # sheet row -> indexes of its transfers handled from buttons
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read ledger state, rescanning: {e}")
+            return
+        if state.get("sheet_key") != self.sheet_key:
+            return
+        self.revision = state.get("revision")
+        self.next_row = state.get("next_row", FIRST_ROW)
+        self.anchor = state.get("anchor")
+        self.open = {int(r): row for r, row in state.get("open", {}).items()}
+        self.posted = {int(r): m for r, m in state.get("posted", {}).items()}
+        self.done = {int(r): set(d) for r, d in state.get("done", {}).items()}
+
+    def _save(self):
+        if self.path is None:
+            return
+        state = {
+            "sheet_key": self.sheet_key,
+            "revision": self.revision,
+            "next_row": self.next_row,
+            "anchor": self.anchor,
+            "open": self.open,
+            "posted": self.posted,
+            "done": {r: sorted(d) for r, d in self.done.items()},
+        }
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def _recheck(self, worksheet):
+        """
+        Re-read columns Y and AC:AF of every row above the cursor, and the
+        anchor row in full. False if rows moved under the cursor.
+        """
+        if self.next_row <= FIRST_ROW:
+            return True
+        last = self.next_row - 1
+        ranges = [f"Y{FIRST_ROW}:Y{last}", f"AC{FIRST_ROW}:{LAST_COLUMN}{last}"]
+        check_anchor = self.anchor is not None
+        if check_anchor:
+            ranges.append(f"A{last}:{LAST_COLUMN}{last}")
+        values = worksheet.batch_get(ranges)
+
+        if check_anchor:
+            anchor = values[2]
+            if _digest(pad(list(anchor[0]) if anchor else [])) != self.anchor:
+                return False
+        completed, transfers = values[0], values[1]
+        for i, row in enumerate(range(FIRST_ROW, self.next_row)):
+            # Only the columns is_outstanding, parse_row and _digest read
+            current = [""] * LEDGER_WIDTH
+            if i < len(completed) and completed[i]:
+                current[24] = completed[i][0]
+            if i < len(transfers):
+                cells = list(transfers[i])
+                current[28:28 + len(cells)] = cells
+            if is_outstanding(current):
+                if row in self.open and _digest(current) != _digest(self.open[row]):
+                    # Edited transfer amounts or IDs: the old buttons don't apply to it
+                    self._drop(row)
+                self.open[row] = current
+            elif row in self.open:
+                self._drop(row)
+        return True
+
+    def _drop(self, row):
+        self.open.pop(row, None)
+        self.posted.pop(row, None)
+        self.done.pop(row, None)
+
+    def update(self):
+        """Bring the cursor up to date and return every outstanding transfer."""
+        with self._lock:
+            revision = self.sheets.revision(self.sheet_key)
+            if revision is None or revision != self.revision:
+                worksheet = self.sheets.worksheet(self.sheet_key, self.worksheet_name)
+                if not self._recheck(worksheet):
+                    print("⚠️ Delinquents rows moved, rescanning the ledger.")
+                    self._reset()
+
+                last = None
+                for first, rows in iter_chunks(worksheet, self.next_row, self.chunk_rows):
+                    numbered = list(enumerate(rows, start=first))
+                    self.open.update(outstanding(numbered))
+                    self.next_row = first + len(rows)
+                    last = rows[-1]
+                if last is not None:
+                    self.anchor = _digest(last)
+                self.revision = revision
+                self._save()
+            return self.transfers()
+
+    def transfers(self):
+        # "row" stays an index into the rows after the header, as parse_transfers gives it
+        return [
+            t for t in iter_transfers((row - FIRST_ROW, self.open[row]) for row in sorted(self.open))
+            if t["index"] not in self.done.get(t["row"] + FIRST_ROW, ())
+        ]
+
+    def unposted(self, transfers):
+        return [t for t in transfers if t["row"] + FIRST_ROW not in self.posted]
+
+    def mark_posted(self, transfers, message_id):
+        with self._lock:
+            for t in transfers:
+                self.posted[t["row"] + FIRST_ROW] = message_id
+            self._save()
+
+    def forget_posts(self):
+        """Treat every open transfer as not posted, e.g. after the messages were purged."""
+        with self._lock:
+            self.posted.clear()
+            self._save()
+
+    def fingerprint(self, transfer):
+        """Digest of the transfer's row as last read, to tell later if the row still holds it."""
+        return _digest(self.open[transfer["row"] + FIRST_ROW])
+
+    def lookup(self, sheet_row, index, fingerprint):
+        """
+        The transfer a button was posted for, as {"row": ..., "index": ...}
+        like transfers() gives, or None if it was already handled, its row
+        is no longer outstanding, or the row now holds a different transfer.
+        """
+        values = self.open.get(sheet_row)
+        if values is None or _digest(values) != fingerprint or index in self.done.get(sheet_row, ()):
+            return None
+        return {"row": sheet_row - FIRST_ROW, "index": index}
+
+    def resolve(self, transfer):
+        """
+        Record that an officer handled one transfer from its buttons. The
+        row stops being tracked once every transfer on it is handled; until
+        then its other buttons keep working.
+        """
+        with self._lock:
+            row = transfer["row"] + FIRST_ROW
+            if row not in self.open:
+                return
+            done = self.done.setdefault(row, set())
+            done.add(transfer["index"])
+            if len(done) >= len(parse_row(transfer["row"], self.open[row])):
+                self._drop(row)
+            self._save()
@@ -0,0 +1,105 @@
+import re
+from bisect import bisect_left, insort
+
+TORN_ID = re.compile(r'\[(\d+)\]')
+
+
+def normalize_name(name):
+    return name.strip().casefold()
+
+
+def parse_torn_id(name):
+    match = TORN_ID.search(name)
+    return int(match.group(1)) if match else None
+
+
+class MemberDirectory:
+    """
+    Lookup tables for one guild's members, built once and then kept in
+    step with join/leave/update events instead of scanning guild.members.
+
+    Display names follow the faction convention "name [torn_id]", so the
+    Torn ID is parsed once per name change rather than on every lookup.
+    """
+
+    def __init__(self, members=()):
+        self.members = {}      # discord id -> discord.Member
+        self.by_torn_id = {}   # torn id -> discord.Member
+        self.by_name = {}      # normalized username or display name -> discord.Member
+        self._sorted = []      # (normalized display name, discord id), for prefix search
+        self._keys = {}        # discord id -> the keys above, for removal
+        for member in members:
+            self.add(member)
+
+    def __len__(self):
+        return len(self.members)
+
+    def add(self, member):
+        if member.id in self.members:
+            self.remove(member)
+        display = normalize_name(member.display_name)
+        username = normalize_name(member.name)
+        torn_id = parse_torn_id(member.display_name)
+
+        self.members[member.id] = member
+        if torn_id is not None:
+            self.by_torn_id[torn_id] = member
+        self.by_name[username] = member
+        self.by_name.setdefault(display, member)
+        insort(self._sorted, (display, member.id))
+        self._keys[member.id] = (display, username, torn_id)
+
+    def remove(self, member):
+        if member.id not in self.members:
+            return
+        display, username, torn_id = self._keys.pop(member.id)
+        del self.members[member.id]
+        if torn_id is not None and getattr(self.by_torn_id.get(torn_id), "id", None) == member.id:
+            del self.by_torn_id[torn_id]
+        for name in (username, display):
+            if getattr(self.by_name.get(name), "id", None) == member.id:
+                del self.by_name[name]
+        i = bisect_left(self._sorted, (display, member.id))
+        if i < len(self._sorted) and self._sorted[i] == (display, member.id):
+            del self._sorted[i]
+
+    def update(self, member):
+        self.add(member)
+
+    def find(self, name):
+        """Member whose username or display name matches, ignoring case."""
+        return self.by_name.get(normalize_name(name))
+
+    def torn_id(self, name_or_member):
+        """Torn ID of a member, or parsed out of a 'name [id]' string."""
+        if isinstance(name_or_member, str):
+            member = self.find(name_or_member)
+            if member is None:
+                return parse_torn_id(name_or_member)
+            name_or_member = member
+        keys = self._keys.get(name_or_member.id)
+        return keys[2] if keys else parse_torn_id(name_or_member.display_name)
+
+    def search(self, query, limit=25):
+        """
+        Display-name prefix matches first (binary search), then substring
+        matches, up to `limit` members.
+        """
+        query = normalize_name(query)
+        results = []
+        seen = set()
+        i = bisect_left(self._sorted, (query,))
+        while i < len(self._sorted) and len(results) < limit:
+            display, member_id = self._sorted[i]
+            if not display.startswith(query):
+                break
+            results.append(self.members[member_id])
+            seen.add(member_id)
+            i += 1
+        if len(results) < limit and query:
+            for display, member_id in self._sorted:
+                if member_id not in seen and query in display:
+                    results.append(self.members[member_id])
+                    if len(results) >= limit:
+                        break
+        return results
@@ -0,0 +1,143 @@
+"""
+One member status table per faction, read by monitor_ocs and
+/oc_assignments alike. It is filled in bulk from the faction's members
+selection, which costs one call for everyone. Per-user profile calls
+(TornClient.get_member_status) only top up members whose row is stale
+or incomplete, a few at a time, so they never take more than a share
+of the faction's rate limit budget.
+"""
+import time
+import asyncio
+from api_limiter import PRIORITY_BACKGROUND
+from models import Member, parse_members
+
+# Seconds before a member's row counts as stale and may be fetched on its own
+MAX_AGE = 300
+# Share of the calls left in the rate window that one refresh may use
+BUDGET_SHARE = 0.25
+# Per-user calls sent together; batches are spaced out over the rate window
+BATCH_SIZE = 5
+
+
+class MemberStatuses:
+    """
+    Member records keyed by Torn ID, with the time each row was last
+    filled. update() replaces the table from a faction response; refresh()
+    fetches profiles for the rows that need it.
+    """
+
+    def __init__(self, torn, max_age=MAX_AGE, budget_share=BUDGET_SHARE, batch_size=BATCH_SIZE, clock=time.time):
+        self.torn = torn
+        self.max_age = max_age
+        self.budget_share = budget_share
+        self.batch_size = batch_size
+        self.clock = clock
+        self.by_id = {}        # member id -> Member
+        self.updated_at = {}   # member id -> when its row was last filled
+        self._refresh = None   # the running refresh, shared by overlapping callers
+        self._source = None    # the members selection update() last parsed
+        self.bulk_updates = 0
+        self.profile_fetches = 0
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, member_id):
+        return member_id in self.by_id
+
+    def get(self, member_id):
+        return self.by_id.get(member_id)
+
+    def members(self):
+        return list(self.by_id.values())
+
+    def update(self, members, fetched_at=None):
+        """
+        Replace the table from a faction members selection (dict or list
+        format). Members no longer listed are dropped; an empty response
+        leaves the table as it was. Returns the parsed members.
+        """
+        if members is self._source:
+            # A cache hit hands back the same response object; it's already in the table
+            return self.members()
+        parsed = parse_members(members)
+        if not parsed:
+            return []
+        self._source = members
+        now = self.clock() if fetched_at is None else fetched_at
+        self.by_id = {m.id: m for m in parsed}
+        self.updated_at = {m.id: now for m in parsed}
+        self.bulk_updates += 1
+        return parsed
+
+    def incomplete(self, member):
+        # The list format can leave these out; a profile has both
+        return not member.last_action or member.state is None
+
+    def needs_fetch(self, first=()):
+        """
+        IDs whose row is stale or incomplete, most urgent first: the ones
+        in `first` (e.g. what a command is about to read), then incomplete
+        rows, then the oldest.
+        """
+        now = self.clock()
+        first = set(first)
+        due = [
+            member_id for member_id, member in self.by_id.items()
+            if self.incomplete(member) or now - self.updated_at[member_id] > self.max_age
+        ]
+        return sorted(due, key=lambda i: (i not in first, not self.incomplete(self.by_id[i]), self.updated_at[i]))
+
+    def _apply_profile(self, member_id, response, now):
+        if not response or "error" in response or member_id not in self.by_id:
+            return False
+        info = response.get("profile") or response
+        fetched = Member.from_torn(member_id, info)
+        # Profiles don't say whether the member is in an OC; the faction data does
+        previous = self.by_id[member_id]
+        fetched.in_oc = previous.in_oc
+        fetched.name = fetched.name or previous.name
+        self.by_id[member_id] = fetched
+        self.updated_at[member_id] = now
+        return True
+
+    async def _run(self, first, priority):
+        limiter = self.torn.limiter
+        budget = int(limiter.remaining() * self.budget_share)
+        ids = self.needs_fetch(first)[:budget]
+        # Even spacing that keeps these calls to budget_share of the limit
+        spacing = self.batch_size * limiter.window / (limiter.max_calls * self.budget_share)
+        fetched = 0
+        for i in range(0, len(ids), self.batch_size):
+            if i:
+                await asyncio.sleep(spacing)
+            batch = ids[i:i + self.batch_size]
+            responses = await asyncio.gather(*(self.torn.get_member_status(m, priority) for m in batch))
+            now = self.clock()
+            fetched += sum(self._apply_profile(m, r, now) for m, r in zip(batch, responses))
+        self.profile_fetches += fetched
+        return fetched
+
+    async def refresh(self, first=(), priority=PRIORITY_BACKGROUND):
+        """
+        Fetch profiles for rows that need it, within this pass's budget;
+        the rest wait for the next refresh. Overlapping calls share one
+        run. Returns how many rows were updated.
+        """
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run(first, priority))
+        return await asyncio.shield(self._refresh)
+
+    def refresh_in_background(self, first=()):
+        """Start refresh() without waiting for it, unless one is already running."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run(first, PRIORITY_BACKGROUND))
+        return self._refresh
+
+    def stats(self):
+        return {
+            "members": len(self.by_id),
+            "bulk_updates": self.bulk_updates,
+            "profile_fetches": self.profile_fetches,
+            "due": len(self.needs_fetch()),
+        }
@@ -0,0 +1,241 @@
+import time
+import asyncio
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds; slash commands have a 3s window
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Seconds between event loop lag samples
+LAG_INTERVAL = 1.0
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    One named metric with a fixed set of labels. Values are updated from
+    the event loop and worker threads and read by the Flask thread, so
+    every access goes through a lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def _samples(self, key, value):
+        yield self.name + self._labels(key), value
+
+    def render(self):
+        with self._lock:
+            values = [(key, list(v) if isinstance(v, list) else v) for key, v in self._values.items()]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(values):
+            lines.extend(f"{name} {_format_value(v)}" for name, v in self._samples(key, value))
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts, then +Inf, sum and count
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 3)
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Time the block. Labels can be filled in inside it, e.g.
+        `with h.time(call="x") as labels: ... labels["result"] = "timeout"`;
+        a "result" label left unset becomes "ok", or "error" if it raised.
+        """
+        start = time.perf_counter()
+        try:
+            yield labels
+        except BaseException:
+            labels.setdefault("result", "error")
+            raise
+        else:
+            labels.setdefault("result", "ok")
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(elapsed, **labels)
+            trace = _trace.get()
+            if trace is not None:
+                trace.add(f"{self.name}{self._labels(self._key(labels))}", start, elapsed)
+
+    def _samples(self, key, counts):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{self._labels(key, [('le', _format_value(float(bound)))])}", cumulative
+        yield f"{self.name}_sum{self._labels(key)}", counts[-2]
+        yield f"{self.name}_count{self._labels(key)}", counts[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+TORN_REQUEST_SECONDS = registry.histogram(
+    "torn_request_seconds", "Torn API request latency by selection set.", ("faction", "selections", "result"))
+LIMITER_WAIT_SECONDS = registry.histogram(
+    "torn_limiter_wait_seconds", "Time spent waiting for a Torn rate limit slot.", ("faction",))
+LIMITER_REJECTIONS = registry.counter(
+    "torn_limiter_rejections_total", "Torn requests dropped after waiting too long for a slot.", ("faction",))
+SHEETS_CALL_SECONDS = registry.histogram(
+    "sheets_call_seconds", "Google Sheets/Drive API call latency.", ("call", "result"))
+DISCORD_SEND_SECONDS = registry.histogram(
+    "discord_send_seconds", "Discord message send latency, retries included.", ("target", "result"))
+DISCORD_RETRIES = registry.counter(
+    "discord_send_retries_total", "Discord sends retried after a rate limit or server error.", ("target",))
+COMMAND_SECONDS = registry.histogram(
+    "command_seconds", "Slash command run time.", ("command", "result"))
+EVENT_LOOP_LAG_SECONDS = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer, sampled every second.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+EVENT_LOOP_LAG = registry.gauge(
+    "event_loop_lag_last_seconds", "Most recent event loop lag sample.")
+STARTUP_PHASE_SECONDS = registry.gauge(
+    "startup_phase_seconds", "How long each phase of the last startup took.", ("phase",))
+
+
+class Trace:
+    """Timed spans recorded while one slash command runs."""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans = []  # (offset, duration, label)
+
+    def add(self, label, start, duration):
+        self.spans.append((start - self.start, duration, label))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def format(self):
+        lines = [f"{self.name} took {self.elapsed():.3f}s"]
+        lines.extend(f"  +{offset:.3f}s {duration:.3f}s {label}" for offset, duration, label in self.spans)
+        return "\n".join(lines)
+
+
+def start_trace(name):
+    """
+    Start collecting spans for the current task. Tasks it creates from
+    now on (e.g. a shared Torn fetch) record into it too.
+    """
+    trace = Trace(name)
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(label):
+    """Record a span in the current trace, if any, without a metric."""
+    trace = _trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add(label, start, time.perf_counter() - start)
+
+
+def record_startup_phase(phase, seconds):
+    STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+    print(f"⏱️ Startup {phase}: {seconds * 1000:.0f} ms")
+
+
+@contextmanager
+def startup_phase(phase):
+    """Time one phase of bringing the bot up, see record_startup_phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_startup_phase(phase, time.perf_counter() - start)
+
+
+async def watch_event_loop(interval=LAG_INTERVAL):
+    """Sample how late a sleep(interval) wakes up, for as long as the bot runs."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        EVENT_LOOP_LAG.set(lag)
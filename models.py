@@ -0,0 +1,184 @@
+"""
+Compact records for the data the monitor loop and /oc_assignments work
+on, parsed once from Torn JSON and sheet rows. Crime and role names are
+interned to small integer IDs so inner loops hash ints, not strings.
+"""
+import numpy as np
+from oc_assignment import CPR_FIELDS
+
+
+def normalize_role(name):
+    return name.strip().lower()
+
+
+class Interner:
+    """Small integer IDs for a set of repeated strings, e.g. crime names."""
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def id(self, name):
+        """ID for name, assigning the next one if it's new."""
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def get(self, name):
+        """ID for name, or None if it was never seen."""
+        return self.ids.get(name)
+
+    def name(self, i):
+        return self.names[i]
+
+
+def iter_members(members):
+    """(member_id, info) pairs from either the dict or the list member format."""
+    if isinstance(members, dict):
+        for pid, info in members.items():
+            yield int(pid), info
+    else:
+        for info in members:
+            yield int(info["id"]), info
+
+
+def member_in_oc(info):
+    if "is_in_oc" in info:
+        return bool(info["is_in_oc"])
+    return info.get("criminal_mission") is not None
+
+
+class Member:
+    """A faction member as seen in one Torn poll."""
+
+    __slots__ = ("id", "name", "in_oc", "last_action", "state")
+
+    def __init__(self, id, name="", in_oc=False, last_action=0, state=None):
+        self.id = id
+        self.name = name
+        self.in_oc = in_oc
+        self.last_action = last_action
+        self.state = state
+
+    def __repr__(self):
+        return f"<Member {self.name} [{self.id}] in_oc={self.in_oc}>"
+
+    @classmethod
+    def from_torn(cls, member_id, info):
+        last_action = info.get("last_action", {})
+        status = info.get("status", {})
+        return cls(
+            int(member_id),
+            info.get("name", ""),
+            member_in_oc(info),
+            int(last_action.get("timestamp", 0) or 0) if isinstance(last_action, dict) else 0,
+            status.get("state") if isinstance(status, dict) else status,
+        )
+
+
+def parse_members(members):
+    """[Member, ...] from Torn's members selection, in either the dict or the list format."""
+    return [Member.from_torn(member_id, info) for member_id, info in iter_members(members)]
+
+
+class CrimeRole:
+    """What one role in one crime needs, from the Crime&Position sheet."""
+
+    __slots__ = ("crime", "role", "level", "required_cpr", "influence")
+
+    def __init__(self, crime, role, level, required_cpr, influence=""):
+        self.crime = crime
+        self.role = role
+        self.level = level
+        self.required_cpr = required_cpr
+        self.influence = influence
+
+
+class OpenSlot:
+    """
+    An empty slot in a planning crime. crime and role are the interned
+    IDs of the EligibilityIndex that parsed it (None if the sheet doesn't
+    know them); crime_name and position keep the text for display.
+    """
+
+    __slots__ = ("crime", "role", "crime_name", "position", "level", "required_cpr")
+
+    def __init__(self, crime, role, crime_name, position, level, required_cpr):
+        self.crime = crime
+        self.role = role
+        self.crime_name = crime_name
+        self.position = position
+        self.level = level
+        self.required_cpr = required_cpr
+
+    def __repr__(self):
+        return f"<OpenSlot {self.crime_name} - {self.position} L{self.level} CPR {self.required_cpr}>"
+
+    @property
+    def key(self):
+        return self.crime, self.role
+
+
+def _number(cell):
+    if isinstance(cell, (int, float)):
+        return cell
+    try:
+        return float(str(cell).replace(",", ""))
+    except ValueError:
+        return 0
+
+
+class CPRTable:
+    """
+    The CPR sheet as one (members x CPR_FIELDS) float array, with member
+    IDs and names alongside, instead of a dict of row dicts per member.
+    Blank or non-numeric cells are 0.
+    """
+
+    __slots__ = ("ids", "names", "values", "_rows")
+
+    def __init__(self, ids, names, values):
+        self.ids = ids
+        self.names = names
+        self.values = values
+        self._rows = {member_id: i for i, member_id in enumerate(ids)}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """From raw sheet values: a header row with "Player ID", "Player Name" and CPR_FIELDS."""
+        if not rows:
+            return cls([], [], np.zeros((0, len(CPR_FIELDS))))
+        headers = rows[0]
+        column = {name: i for i, name in enumerate(headers)}
+        id_col, name_col = column.get("Player ID"), column.get("Player Name")
+        cpr_cols = [column.get(field) for field in CPR_FIELDS]
+
+        ids, names, values = [], [], []
+        for row in rows[1:]:
+            raw_id = str(row[id_col]).strip() if id_col is not None and id_col < len(row) else ""
+            if not raw_id.isdigit():
+                continue
+            ids.append(int(raw_id))
+            names.append(row[name_col] if name_col is not None and name_col < len(row) else "")
+            values.append([_number(row[c]) if c is not None and c < len(row) else 0 for c in cpr_cols])
+        return cls(ids, names, np.array(values, dtype=float).reshape(len(ids), len(CPR_FIELDS)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, member_id):
+        return member_id in self._rows
+
+    def name(self, member_id):
+        return self.names[self._rows[member_id]]
+
+    def matrix(self, member_ids):
+        """CPR rows for member_ids, in that order, for oc_assignment.suggest_oc_batch."""
+        return self.values[[self._rows[m] for m in member_ids]]
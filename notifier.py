@@ -0,0 +1,95 @@
+import os
+import json
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_FILE = BASE_DIR / "monitor_state.json"
+
+# Scope levels worth announcing when the faction's scope crosses them
+SCOPE_THRESHOLDS = [1, 2, 4]
+
+# Discord rejects messages over 2000 characters
+MESSAGE_LIMIT = 1900
+
+
+class ChangeNotifier:
+    """
+    Remembers what monitor_ocs saw last cycle (whether each member was in
+    a crime, their suggested level, the faction scope) and reports only
+    what changed. The state is kept on disk so a restart doesn't re-announce
+    everyone.
+    """
+
+    def __init__(self, path=STATE_FILE, scope_thresholds=SCOPE_THRESHOLDS):
+        self.path = Path(path)
+        self.scope_thresholds = sorted(scope_thresholds)
+        self.members = {}
+        self.scope = None
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read monitor state, starting fresh: {e}")
+            return
+        self.members = state.get("members", {})
+        self.scope = state.get("scope")
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"members": self.members, "scope": self.scope}, f)
+        os.replace(tmp, self.path)
+
+    def update(self, members, scope):
+        """
+        members: {player_id: {"free": bool, "level": int}} for this cycle.
+        Returns (member_events, scope_event). Member events are
+        {"pid", "kind": "free" | "level", "level", "previous"} and only
+        cover members who are free with a suggested level.
+        """
+        events = []
+        for pid, now in members.items():
+            before = self.members.get(pid)
+            if not now["free"] or not now["level"]:
+                continue
+            if before is None or not before["free"] or not before["level"]:
+                events.append({"pid": pid, "kind": "free", "level": now["level"], "previous": None})
+            elif before["level"] != now["level"]:
+                events.append({"pid": pid, "kind": "level", "level": now["level"], "previous": before["level"]})
+
+        scope_event = self._scope_crossing(self.scope, scope)
+
+        self.members = {pid: dict(state) for pid, state in members.items()}
+        self.scope = scope
+        self._save()
+        return events, scope_event
+
+    def _scope_crossing(self, before, now):
+        if before is None or before == now:
+            return None
+        for threshold in reversed(self.scope_thresholds):
+            if before < threshold <= now:
+                return f"🔋 Scope rose to **{now}** (now at least {threshold})."
+        for threshold in self.scope_thresholds:
+            if now < threshold <= before:
+                return f"🪫 Scope dropped to **{now}** (below {threshold})."
+        return None
+
+
+def digest_messages(lines, limit=MESSAGE_LIMIT):
+    """Pack lines into as few messages as fit under Discord's length limit."""
+    messages = []
+    current = ""
+    for line in lines:
+        if current and len(current) + len(line) + 1 > limit:
+            messages.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        messages.append(current)
+    return messages
@@ -1,30 +1,35 @@
-def suggest_oc(player_cpr, current_scope):
+import numpy as np
+
+CPR_FIELDS = ['CPR Leader', 'CPR Hacker', 'CPR Driver', 'CPR Pointman', 'CPR Other']
+
+# OC Levels and requirements, checked in order; override with "oc_levels" in config.json
+OC_LEVELS = [
+    {"level": 8, "min_cpr": 60, "scope_cost": 4},
+    {"level": 7, "min_cpr": 65, "scope_cost": 4},
+    {"level": 6, "min_cpr": 70, "scope_cost": 4},
+    {"level": 5, "min_cpr": 70, "scope_cost": 2},
+    {"level": 4, "min_cpr": 70, "scope_cost": 2},
+    {"level": 3, "min_cpr": 70, "scope_cost": 2},
+    {"level": 2, "min_cpr": 70, "scope_cost": 1},
+    {"level": 1, "min_cpr": 0,  "scope_cost": 1}
+]
+
+
+def _cpr_value(value):
+    # Blank sheet cells come through as ''
+    return value if isinstance(value, (int, float)) else 0
+
+
+def suggest_oc(player_cpr, current_scope, oc_levels=OC_LEVELS):
     """
     Given a player's CPR record and current faction scope,
     suggest the highest OC they qualify for.
     """
 
-    # Extract average CPR across roles
-    cpr_values = [
-        player_cpr.get('CPR Leader', 0),
-        player_cpr.get('CPR Hacker', 0),
-        player_cpr.get('CPR Driver', 0),
-        player_cpr.get('CPR Pointman', 0),
-        player_cpr.get('CPR Other', 0)
-    ]
-    avg_cpr = sum(cpr_values) / len([c for c in cpr_values if c > 0])
-
-    # OC Levels and requirements
-    oc_levels = [
-        {"level": 8, "min_cpr": 60, "scope_cost": 4},
-        {"level": 7, "min_cpr": 65, "scope_cost": 4},
-        {"level": 6, "min_cpr": 70, "scope_cost": 4},
-        {"level": 5, "min_cpr": 70, "scope_cost": 2},
-        {"level": 4, "min_cpr": 70, "scope_cost": 2},
-        {"level": 3, "min_cpr": 70, "scope_cost": 2},
-        {"level": 2, "min_cpr": 70, "scope_cost": 1},
-        {"level": 1, "min_cpr": 0,  "scope_cost": 1}
-    ]
+    # Average CPR across the roles the player has a CPR for
+    cpr_values = [_cpr_value(player_cpr.get(field, 0)) for field in CPR_FIELDS]
+    rated = [c for c in cpr_values if c > 0]
+    avg_cpr = sum(rated) / len(rated) if rated else 0
 
     # Find the best matching OC
     for oc in oc_levels:
@@ -32,3 +37,53 @@ def suggest_oc(player_cpr, current_scope):
             return oc["level"], oc["scope_cost"]
 
     return None, None
+
+
+def cpr_matrix(cpr_data, player_ids=None):
+    """
+    Stack CPR records into a (members x roles) float matrix.
+    Returns (player_ids, matrix) with rows in player_ids order.
+    """
+    player_ids = list(cpr_data) if player_ids is None else list(player_ids)
+    matrix = np.array(
+        [[_cpr_value(cpr_data[pid].get(field, 0)) for field in CPR_FIELDS] for pid in player_ids],
+        dtype=float,
+    ).reshape(len(player_ids), len(CPR_FIELDS))
+    return player_ids, matrix
+
+
+def suggest_oc_batch(matrix, current_scope, oc_levels=OC_LEVELS):
+    """
+    suggest_oc for a whole faction at once.
+
+    Levels are handed out in oc_levels order from a running scope budget:
+    each level takes as many of its qualifying members (highest average
+    CPR first) as the remaining scope pays for, and the rest fall through
+    to the next level. Together the suggestions never cost more than
+    current_scope.
+
+    Returns (levels, costs) arrays with 0 where nothing fits.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    rated = matrix > 0
+    counts = rated.sum(axis=1)
+    avg = np.divide(np.where(rated, matrix, 0).sum(axis=1), counts,
+                    out=np.zeros(len(matrix)), where=counts > 0)
+
+    levels = np.zeros(len(matrix), dtype=int)
+    costs = np.zeros(len(matrix), dtype=int)
+    order = np.argsort(-avg, kind="stable")
+    sorted_avg = avg[order]
+    remaining = current_scope
+
+    for oc in oc_levels:
+        cost = oc["scope_cost"]
+        if remaining < cost:
+            continue
+        candidates = order[(sorted_avg >= oc["min_cpr"]) & (levels[order] == 0)]
+        take = candidates[:int(remaining // cost)] if cost > 0 else candidates
+        levels[take] = oc["level"]
+        costs[take] = cost
+        remaining -= cost * len(take)
+
+    return levels, costs
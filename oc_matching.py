@@ -0,0 +1,117 @@
+import heapq
+import itertools
+
+# A filled slot's level counts for more than any CPR margin (margins are 0-100)
+LEVEL_WEIGHT = 101
+MAX_LEVEL = 10
+
+
+def slot_weight(slot, cpr):
+    return slot.level * LEVEL_WEIGHT + (cpr - slot.required_cpr)
+
+
+def assign_slots(slots, available_ids, role_index):
+    """
+    Fill open slots with available members.
+
+    Solves the assignment as a min-cost bipartite matching, so the result
+    fills as many slots as possible and, among those fillings, prefers
+    higher level crimes and larger CPR margins. Each member is used once.
+
+    slots: [models.OpenSlot, ...]
+    role_index: EligibilityIndex.role_index(), or role_index_for() these slots
+    Returns [(slot, member_id, cpr), ...] in slot order.
+    """
+    max_w = MAX_LEVEL * LEVEL_WEIGHT + 100
+    # Filling one more slot always beats any gain in weight elsewhere
+    fill_bonus = (max_w + 1) * (len(slots) + 1)
+
+    edges = []
+    cprs = []
+    for r, slot in enumerate(slots):
+        candidates = role_index.get(slot.key, {})
+        row = []
+        row_cpr = {}
+        for member_id, cpr in candidates.items():
+            if member_id in available_ids and cpr >= slot.required_cpr:
+                w = min(slot_weight(slot, cpr), max_w)
+                row.append((member_id, max_w - w))
+                row_cpr[member_id] = cpr
+        # Private "leave unfilled" column keeps every row assignable
+        row.append((("unfilled", r), fill_bonus + max_w))
+        edges.append(row)
+        cprs.append(row_cpr)
+
+    match = _min_cost_assignment(edges)
+    return [
+        (slot, match[r], cprs[r][match[r]])
+        for r, slot in enumerate(slots)
+        if match[r] in cprs[r]
+    ]
+
+
+def _min_cost_assignment(edges):
+    """
+    Sparse Hungarian algorithm (successive shortest paths with Dijkstra and
+    potentials). edges[r] is a list of (column, cost) with cost >= 0 and
+    must let every row be matched. Returns the column chosen for each row.
+    """
+    inf = float("inf")
+    n = len(edges)
+    u = [0] * n          # row potentials
+    v = {}               # column potentials
+    match_row = [None] * n
+    match_col = {}
+    tie = itertools.count()
+
+    for r in range(n):
+        dist = {}
+        prev = {}
+        done = set()
+        heap = []
+        for col, cost in edges[r]:
+            d = cost - u[r] - v.get(col, 0)
+            if d < dist.get(col, inf):
+                dist[col] = d
+                prev[col] = r
+                heapq.heappush(heap, (d, next(tie), col))
+
+        free_col = None
+        while heap:
+            d, _, col = heapq.heappop(heap)
+            if col in done or d > dist[col]:
+                continue
+            done.add(col)
+            if col not in match_col:
+                free_col = col
+                break
+            i = match_col[col]
+            for col2, cost in edges[i]:
+                if col2 in done:
+                    continue
+                nd = d + cost - u[i] - v.get(col2, 0)
+                if nd < dist.get(col2, inf):
+                    dist[col2] = nd
+                    prev[col2] = i
+                    heapq.heappush(heap, (nd, next(tie), col2))
+
+        # Keep reduced costs non-negative and the matched edges tight
+        total = dist[free_col]
+        for col in done:
+            delta = total - dist[col]
+            v[col] = v.get(col, 0) - delta
+            if col in match_col:
+                u[match_col[col]] += delta
+        u[r] += total
+
+        col = free_col
+        while True:
+            row = prev[col]
+            next_col = match_row[row]
+            match_row[row] = col
+            match_col[col] = row
+            if row == r:
+                break
+            col = next_col
+
+    return match_row
@@ -0,0 +1,79 @@
+import time
+import asyncio
+from models import iter_members, member_in_oc
+
+# Bounds on the gap between two monitor polls, in seconds
+MIN_INTERVAL = 60
+MAX_INTERVAL = 900
+DEFAULT_INTERVAL = 300
+# Poll this long after an OC's ready_at, once its members are free again
+READY_GRACE = 30
+# Members seen this recently who are not in an OC may join one any moment
+ACTIVE_WINDOW = 900
+# Below this share of the API budget left, polls are spaced out further
+LOW_BUDGET = 0.25
+
+
+class AdaptiveScheduler:
+    """
+    Decides when monitor_ocs should poll next: just after the next OC
+    completes, at the default pace while idle members are active, and
+    backed off when nothing is pending or the API budget runs low.
+    trigger() wakes a pending sleep early, e.g. from the refresh endpoint.
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 default_interval=DEFAULT_INTERVAL, clock=time.time):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.clock = clock
+        self._wake = asyncio.Event()
+
+    def next_delay(self, faction_data, budget_left=None, budget_total=None):
+        """
+        Seconds until the next poll. faction_data needs the crime list with
+        ready_at times, i.e. the crimes,members response.
+        """
+        now = self.clock()
+        if not faction_data:
+            delay = self.default_interval
+        else:
+            delay = self.max_interval
+
+            crimes = faction_data.get("crimes", [])
+            if isinstance(crimes, dict):
+                crimes = crimes.values()
+            for crime in crimes:
+                if not isinstance(crime, dict):
+                    continue
+                ready_at = crime.get("ready_at") or crime.get("time_ready")
+                if ready_at and ready_at + READY_GRACE > now:
+                    delay = min(delay, ready_at + READY_GRACE - now)
+
+            for _, info in iter_members(faction_data.get("members", {})):
+                last_action = info.get("last_action", {})
+                seen = last_action.get("timestamp", 0) if isinstance(last_action, dict) else 0
+                if not member_in_oc(info) and now - int(seen) < ACTIVE_WINDOW:
+                    delay = min(delay, self.default_interval)
+                    break
+
+        if budget_total and budget_left is not None and budget_left / budget_total < LOW_BUDGET:
+            delay *= 2
+
+        return max(self.min_interval, min(self.max_interval, delay))
+
+    def trigger(self):
+        # Not thread-safe; from other threads use loop.call_soon_threadsafe
+        self._wake.set()
+
+    async def sleep(self, delay):
+        """
+        Sleep for delay seconds or until trigger() is called. A trigger that
+        arrived while the last poll was running ends the sleep at once.
+        """
+        try:
+            await asyncio.wait_for(self._wake.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
@@ -0,0 +1,199 @@
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+import metrics
+
+BASE_DIR = Path(__file__).resolve().parent
+SNAPSHOT_DB = BASE_DIR / "sheet_snapshots.db"
+CREDS_FILE = "google_creds.json"
+
+# Drive metadata is needed to read a spreadsheet's last modified time
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
+]
+
+# Seconds a snapshot is trusted before the spreadsheet revision is rechecked
+CHECK_INTERVAL = 300
+
+
+class SnapshotStore:
+    """
+    On-disk copy of each worksheet's values, keyed by spreadsheet and
+    worksheet name, so a restart starts from the last download.
+    """
+
+    def __init__(self, path=SNAPSHOT_DB):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS worksheets (
+                sheet_key  TEXT NOT NULL,
+                worksheet  TEXT NOT NULL,
+                revision   TEXT,
+                checked_at REAL NOT NULL,
+                fetched_at REAL NOT NULL,
+                rows       BLOB NOT NULL,
+                PRIMARY KEY (sheet_key, worksheet)
+            )
+        """)
+        self._db.commit()
+
+    def load(self, sheet_key, worksheet):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT revision, checked_at, fetched_at, rows FROM worksheets WHERE sheet_key = ? AND worksheet = ?",
+                (sheet_key, worksheet),
+            ).fetchone()
+        if row is None:
+            return None
+        revision, checked_at, fetched_at, blob = row
+        return {
+            "revision": revision,
+            "checked_at": checked_at,
+            "fetched_at": fetched_at,
+            "rows": json.loads(zlib.decompress(blob)),
+        }
+
+    def save(self, sheet_key, worksheet, revision, rows, now):
+        blob = zlib.compress(json.dumps(rows, separators=(",", ":")).encode())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO worksheets VALUES (?, ?, ?, ?, ?, ?)",
+                (sheet_key, worksheet, revision, now, now, blob),
+            )
+            self._db.commit()
+
+    def keys(self):
+        """(sheet key, worksheet) of every stored snapshot."""
+        with self._lock:
+            return self._db.execute("SELECT sheet_key, worksheet FROM worksheets").fetchall()
+
+    def touch(self, sheet_key, worksheet, now):
+        with self._lock:
+            self._db.execute(
+                "UPDATE worksheets SET checked_at = ? WHERE sheet_key = ? AND worksheet = ?",
+                (now, sheet_key, worksheet),
+            )
+            self._db.commit()
+
+
+class SheetSync:
+    """
+    Holds one authorized gspread client and serves worksheet values from
+    the snapshot store, re-downloading a worksheet only when the
+    spreadsheet's last modified time has moved on.
+
+    Pass `client` (e.g. fake_gspread.FakeClient) to run without Google.
+    """
+
+    def __init__(self, store=None, client=None, creds_file=CREDS_FILE,
+                 check_interval=CHECK_INTERVAL, clock=time.time):
+        self.store = store if store is not None else SnapshotStore()
+        self.creds_file = creds_file
+        self.check_interval = check_interval
+        self.clock = clock
+        self._client = client
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._snapshots = {}
+        self._lock = threading.RLock()
+        self.fetches = 0
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                # gspread and google-auth take a while to import; only pay for it when Sheets is used
+                import gspread
+                from google.oauth2.service_account import Credentials
+                creds = Credentials.from_service_account_file(self.creds_file, scopes=SCOPES)
+                self._client = gspread.authorize(creds)
+            return self._client
+
+    def spreadsheet(self, sheet_key):
+        with self._lock:
+            if sheet_key not in self._spreadsheets:
+                with metrics.SHEETS_CALL_SECONDS.time(call="open_by_key"):
+                    self._spreadsheets[sheet_key] = self.client.open_by_key(sheet_key)
+            return self._spreadsheets[sheet_key]
+
+    def worksheet(self, sheet_key, name):
+        with self._lock:
+            if (sheet_key, name) not in self._worksheets:
+                spreadsheet = self.spreadsheet(sheet_key)
+                with metrics.SHEETS_CALL_SECONDS.time(call="worksheet"):
+                    self._worksheets[(sheet_key, name)] = spreadsheet.worksheet(name)
+            return self._worksheets[(sheet_key, name)]
+
+    def revision(self, sheet_key):
+        try:
+            spreadsheet = self.spreadsheet(sheet_key)
+            with metrics.SHEETS_CALL_SECONDS.time(call="get_lastUpdateTime"):
+                return str(spreadsheet.get_lastUpdateTime())
+        except Exception as e:
+            # Without a revision we can't tell, so the caller re-downloads
+            print(f"⚠️ Could not read revision of sheet {sheet_key}: {e}")
+            return None
+
+    def _snapshot(self, sheet_key, name):
+        snapshot = self._snapshots.get((sheet_key, name))
+        if snapshot is None:
+            snapshot = self.store.load(sheet_key, name)
+            if snapshot is not None:
+                self._snapshots[(sheet_key, name)] = snapshot
+        return snapshot
+
+    def preload(self):
+        """
+        Read every stored snapshot into memory, so the first commands after
+        a restart are served without waiting on disk. Returns how many.
+        """
+        for sheet_key, name in self.store.keys():
+            self._snapshot(sheet_key, name)
+        return len(self._snapshots)
+
+    def get_values(self, sheet_key, name, max_age=None):
+        """
+        Return all values of a worksheet. The snapshot is used as-is if it
+        was checked within `max_age` seconds (default: check_interval).
+        """
+        max_age = self.check_interval if max_age is None else max_age
+        now = self.clock()
+        snapshot = self._snapshot(sheet_key, name)
+        if snapshot is not None and now - snapshot["checked_at"] < max_age:
+            return snapshot["rows"]
+
+        revision = self.revision(sheet_key)
+        if snapshot is not None and revision is not None and revision == snapshot["revision"]:
+            snapshot["checked_at"] = now
+            self.store.touch(sheet_key, name, now)
+            return snapshot["rows"]
+
+        worksheet = self.worksheet(sheet_key, name)
+        with metrics.SHEETS_CALL_SECONDS.time(call="get_all_values"):
+            rows = worksheet.get_all_values()
+        self.fetches += 1
+        self._snapshots[(sheet_key, name)] = {"revision": revision, "checked_at": now, "fetched_at": now, "rows": rows}
+        self.store.save(sheet_key, name, revision, rows, now)
+        return rows
+
+    def version(self, sheet_key, name):
+        """Changes whenever the worksheet is re-downloaded; None if never loaded."""
+        snapshot = self._snapshot(sheet_key, name)
+        return snapshot["fetched_at"] if snapshot is not None else None
+
+    def get_records(self, sheet_key, name, max_age=None):
+        """Same as gspread's get_all_records(), built from the snapshot."""
+        from gspread.utils import numericise_all
+        rows = self.get_values(sheet_key, name, max_age)
+        if not rows:
+            return []
+        headers = rows[0]
+        return [dict(zip(headers, numericise_all(row))) for row in rows[1:]]
+
+
+sync = SheetSync()
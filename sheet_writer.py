@@ -0,0 +1,78 @@
+import asyncio
+import metrics
+from executor import run_io
+
+# Seconds to collect cell updates before sending them as one batch
+FLUSH_INTERVAL = 0.3
+# Attempts for a batch that hits the Sheets quota or a server error
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_STATUSES = {429, 500, 502, 503}
+
+
+class SheetWriter:
+    """
+    Write-behind buffer for worksheet cell updates. Callers queue writes
+    and return straight away; every FLUSH_INTERVAL the queued cells of each
+    worksheet go out as one batch_update on the I/O pool. Call close()
+    on shutdown to flush whatever is still queued.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_retries=MAX_RETRIES, base_delay=RETRY_BASE_DELAY):
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._pending = {}   # worksheet -> {range: values}, last write to a range wins
+        self._timer = None
+        self._lock = asyncio.Lock()
+        self.batches = 0
+        self.cells = 0
+        self.failed = 0
+
+    def write(self, worksheet, range_name, values):
+        self._pending.setdefault(worksheet, {})[range_name] = values
+        self.cells += 1
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+        # Writes queued while this flush was running get their own batch
+        if self._pending:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            for worksheet, updates in pending.items():
+                data = [{"range": r, "values": v} for r, v in updates.items()]
+                await self._send(worksheet, data)
+
+    async def _send(self, worksheet, data):
+        from gspread.exceptions import APIError
+        for attempt in range(self.max_retries):
+            try:
+                with metrics.SHEETS_CALL_SECONDS.time(call="batch_update"):
+                    await run_io(worksheet.batch_update, data)
+                self.batches += 1
+                return
+            except APIError as e:
+                reason = e.response.status_code
+                if reason not in RETRY_STATUSES:
+                    break
+            except Exception as e:
+                # Connection errors and the like are worth another try
+                reason = repr(e)
+            if attempt == self.max_retries - 1:
+                break
+            delay = self.base_delay * 2 ** attempt
+            print(f"⚠️ Sheets write failed ({reason}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+        self.failed += len(data)
+        print(f"🔥 Dropped sheet update for {[d['range'] for d in data]}")
+
+    async def close(self):
+        if self._timer is not None:
+            await self._timer  # at most one flush interval away
+        await self.flush()
@@ -0,0 +1,288 @@
+"""
+What-if simulation for OC planning. Starting from a faction snapshot
+(stored history, or fixtures the caller builds), it plays many planning
+cycles under a policy and reports how many open slots got filled and
+how much scope was spent. Nothing here calls Torn or Google.
+
+A policy picks:
+- oc_levels:  the suggest_oc thresholds (same shape as OC_LEVELS); every
+  rule pays its scope_cost, only "suggested" creation reads min_cpr
+- assignment: "matching" (oc_matching.assign_slots) or "greedy"
+  (hardest slot first, first member who qualifies)
+- creation:   when to start new crimes: "suggested" (enough open slots
+  for every member suggest_oc_batch puts at a level), "fill_counts" (one
+  crime per level that has a qualifying idle member, like the
+  /oc_assignments hint) or "none"
+
+Each cycle: scope regenerates, members are active at random, crimes are
+created and paid for in scope, idle active members are assigned, full
+crimes run for a few cycles and release their members, and crimes
+still recruiting after EXPIRE_CYCLES expire.
+"""
+import random
+import statistics
+from eligibility import EligibilityIndex, CPR_SHEET, CRIME_SHEET
+from models import CPRTable, OpenSlot, normalize_role
+from oc_assignment import OC_LEVELS, suggest_oc_batch
+from oc_matching import assign_slots
+
+# Scope gained per cycle
+SCOPE_REGEN = 2
+# Cycles a crime runs once every slot is filled
+DURATION = (1, 4)
+# Cycles a crime may recruit before it expires
+EXPIRE_CYCLES = 6
+# Chance per cycle that a member is around to be assigned
+ACTIVE_CHANCE = 0.9
+INACTIVE_CHANCE = 0.1
+# Cost of a crime at a level oc_levels doesn't list
+DEFAULT_SCOPE_COST = 1
+
+
+class Snapshot:
+    """
+    One starting point for simulation, as plain picklable data.
+
+    member_ids, cpr:  members and their CPR_FIELDS rows (for suggest_oc_batch);
+                      rows maps a member id to its row
+    activity:         member id -> chance of being active in a cycle
+    role_index:       EligibilityIndex.role_index()
+    templates:        level -> [[(crime, role, required_cpr), ...] per crime]
+    qualifiers:       level -> members who qualify for its hardest roles
+    crimes:           crimes already recruiting, as [level, [[crime, role, required, member], ...]]
+    scope:            scope at the start
+    """
+
+    def __init__(self, member_ids, cpr, activity, index, crimes, scope):
+        self.member_ids = list(member_ids)
+        self.rows = {m: i for i, m in enumerate(self.member_ids)}
+        self.cpr = cpr
+        self.activity = activity
+        self.role_index = index.role_index()
+        self.qualifiers = index.level_qualifiers
+        self.templates = {}
+        per_crime = {}
+        for (crime, role), requirement in index.requirements.items():
+            per_crime.setdefault(crime, []).append((crime, role, requirement.required_cpr))
+        for crime, roles in per_crime.items():
+            self.templates.setdefault(index.crime_levels.get(crime, 0), []).append(roles)
+        self.crimes = crimes
+        self.scope = scope
+
+    @classmethod
+    def from_torn(cls, index, cpr_table, crimes, activity, scope):
+        """From Torn's crimes list and the faction's CPR table."""
+        members = [m for m in cpr_table.ids if m in activity]
+        recruiting = []
+        for c in crimes:
+            crime = index.crimes.get(c.get("name"))
+            if crime is None:
+                continue
+            slots = []
+            for slot in c.get("slots", []):
+                role = index.roles.get(normalize_role(slot.get("position", "")))
+                user = slot.get("user") or {}
+                required = slot.get("checkpoint_pass_rate")
+                if required is None:
+                    requirement = index.requirements.get((crime, role))
+                    required = requirement.required_cpr if requirement else 0
+                slots.append([crime, role, required, user.get("id")])
+            recruiting.append([index.crime_levels.get(crime, 0), slots])
+        return cls(members, cpr_table.matrix(members), activity, index, recruiting, scope)
+
+
+def history_snapshots(history, store, oc_sheet_key, cpr_sheet_key, cpr_sheet_name, since, limit=50):
+    """
+    Snapshots from recorded polls (faction_history.FactionHistory) and the
+    stored sheet downloads (sheet_sync.SnapshotStore), evenly spread over
+    the polls since `since`. Members seen at a poll are taken as active.
+    """
+    sheets = {}
+    for key, name in ((oc_sheet_key, CPR_SHEET), (oc_sheet_key, CRIME_SHEET), (cpr_sheet_key, cpr_sheet_name)):
+        snapshot = store.load(key, name)
+        if snapshot is None:
+            raise ValueError(f"No stored download of {name} in {key}; run the bot once first.")
+        sheets[name] = snapshot["rows"]
+    index = EligibilityIndex(sheets[CPR_SHEET], sheets[CRIME_SHEET])
+    cpr_table = CPRTable.from_rows(sheets[cpr_sheet_name])
+
+    polls = history.scope_trend(since)
+    step = max(1, len(polls) // limit)
+    snapshots = []
+    for ts, scope in polls[::step]:
+        crimes = {}
+        for crime_id, crime_name, position, user_id, ready_at in history.slots_at(ts):
+            crime = crimes.setdefault(crime_id, {"name": crime_name, "ready_at": ready_at, "slots": []})
+            crime["slots"].append({"position": position, "user": {"id": user_id} if user_id else None})
+        activity = {member_id: ACTIVE_CHANCE for member_id in history.members_at(ts)}
+        snapshots.append(Snapshot.from_torn(index, cpr_table, list(crimes.values()), activity, scope or 0))
+    return snapshots
+
+
+def _greedy(slots, available_ids, role_index):
+    available = set(available_ids)
+    out = []
+    for slot in sorted(slots, key=lambda s: (-s.required_cpr, -s.level)):
+        candidates = role_index.get(slot.key, {})
+        for member_id in sorted(available):
+            cpr = candidates.get(member_id, 0)
+            if cpr and cpr >= slot.required_cpr:
+                out.append((slot, member_id, cpr))
+                available.discard(member_id)
+                break
+    return out
+
+
+ASSIGNMENT = {"matching": assign_slots, "greedy": _greedy}
+
+
+def _create_crimes(snapshot, policy, idle, crimes, scope, rng):
+    """New crimes per the policy's creation rule; returns the scope spent."""
+    costs = {oc["level"]: oc["scope_cost"] for oc in policy["oc_levels"]}
+    open_at = {}
+    for level, slots in crimes:
+        open_at[level] = open_at.get(level, 0) + sum(1 for s in slots if s[3] is None)
+
+    wanted = {}
+    if policy["creation"] == "suggested":
+        rows = [snapshot.rows[m] for m in idle]
+        levels, _ = suggest_oc_batch(snapshot.cpr[rows], scope, policy["oc_levels"])
+        for level in levels[levels > 0].tolist():
+            wanted[level] = wanted.get(level, 0) + 1
+    elif policy["creation"] == "fill_counts":
+        idle_set = set(idle)
+        wanted = {level: 1 for level, members in snapshot.qualifiers.items() if members & idle_set}
+
+    spent = 0
+    for level in sorted(wanted, reverse=True):
+        templates = snapshot.templates.get(level)
+        cost = costs.get(level, DEFAULT_SCOPE_COST)
+        while templates and open_at.get(level, 0) < wanted[level] and scope - spent >= cost:
+            roles = rng.choice(templates)
+            crimes.append([level, [[crime, role, required, None] for crime, role, required in roles]])
+            open_at[level] = open_at.get(level, 0) + len(roles)
+            spent += cost
+            if policy["creation"] == "fill_counts":
+                break
+    return spent
+
+
+def simulate(snapshot, policy, cycles, seed):
+    """
+    Play `cycles` planning cycles from snapshot under policy. Returns
+    totals: open (open slots offered), filled, scope_spent, scope_total,
+    completed and expired crimes.
+    """
+    rng = random.Random(seed)
+    assign = ASSIGNMENT[policy["assignment"]]
+    crimes = [[level, [list(s) for s in slots]] for level, slots in snapshot.crimes]
+    ages = [0] * len(crimes)
+    running = []   # [cycles left, members]
+    busy = {s[3] for _, slots in crimes for s in slots if s[3] is not None}
+    scope = snapshot.scope
+    totals = {"open": 0, "filled": 0, "scope_spent": 0, "scope_total": scope, "completed": 0, "expired": 0}
+
+    for _ in range(cycles):
+        scope += SCOPE_REGEN
+        totals["scope_total"] += SCOPE_REGEN
+        idle = [m for m in snapshot.member_ids if m not in busy and rng.random() < snapshot.activity.get(m, 0)]
+
+        before = len(crimes)
+        spent = _create_crimes(snapshot, policy, idle, crimes, scope, rng)
+        ages.extend([0] * (len(crimes) - before))
+        scope -= spent
+        totals["scope_spent"] += spent
+
+        open_slots, where = [], []
+        for c, (level, slots) in enumerate(crimes):
+            for s, (crime, role, required, member) in enumerate(slots):
+                if member is None:
+                    open_slots.append(OpenSlot(crime, role, "", "", level, required))
+                    where.append((c, s))
+        totals["open"] += len(open_slots)
+        matched = assign(open_slots, set(idle), snapshot.role_index)
+        position = {id(slot): i for i, slot in enumerate(open_slots)}
+        for slot, member_id, _ in matched:
+            c, s = where[position[id(slot)]]
+            crimes[c][1][s][3] = member_id
+            busy.add(member_id)
+        totals["filled"] += len(matched)
+
+        for run in running:
+            run[0] -= 1
+        for _, members in [r for r in running if r[0] <= 0]:
+            busy.difference_update(members)
+            totals["completed"] += 1
+        running = [r for r in running if r[0] > 0]
+
+        still = []
+        for (level, slots), age in zip(crimes, ages):
+            members = [s[3] for s in slots if s[3] is not None]
+            if len(members) == len(slots):
+                running.append([rng.randint(*DURATION), members])
+            elif age + 1 >= EXPIRE_CYCLES:
+                busy.difference_update(members)
+                totals["expired"] += 1
+            else:
+                still.append(([level, slots], age + 1))
+        crimes = [c for c, _ in still]
+        ages = [a for _, a in still]
+    return totals
+
+
+def _run(args):
+    snapshot, policy, cycles, seed = args
+    return simulate(snapshot, policy, cycles, seed)
+
+
+def evaluate(snapshots, policies, runs, cycles, pool=None, seed=1):
+    """
+    simulate() each policy `runs` times, starting from the snapshots in
+    turn, on `pool` (a concurrent.futures executor) if given. Returns one
+    summary dict per policy: mean and stdev of the fill rate and scope
+    usage, plus crimes completed and expired per run.
+    """
+    jobs = [
+        (snapshots[run % len(snapshots)], policy, cycles, seed + run)
+        for policy in policies for run in range(runs)
+    ]
+    results = list(pool.map(_run, jobs, chunksize=max(1, len(jobs) // 64)) if pool else map(_run, jobs))
+
+    summaries = []
+    for p, policy in enumerate(policies):
+        totals = results[p * runs:(p + 1) * runs]
+        fill = [t["filled"] / t["open"] if t["open"] else 0.0 for t in totals]
+        usage = [t["scope_spent"] / t["scope_total"] if t["scope_total"] else 0.0 for t in totals]
+        summaries.append({
+            "policy": policy["name"],
+            "fill_rate": statistics.fmean(fill),
+            "fill_rate_sd": statistics.pstdev(fill),
+            "scope_usage": statistics.fmean(usage),
+            "scope_usage_sd": statistics.pstdev(usage),
+            "completed": statistics.fmean(t["completed"] for t in totals),
+            "expired": statistics.fmean(t["expired"] for t in totals),
+        })
+    return summaries
+
+
+def shifted_levels(delta, oc_levels=OC_LEVELS):
+    """oc_levels with every non-zero min_cpr moved by delta, for threshold sweeps."""
+    return [dict(oc, min_cpr=max(0, oc["min_cpr"] + delta) if oc["min_cpr"] else 0) for oc in oc_levels]
+
+
+def default_policies(oc_levels=OC_LEVELS, deltas=(-10, -5, 0, 5)):
+    """
+    A min_cpr sweep for "suggested" creation with matching, the one rule
+    the thresholds change; "fill_counts" with matching; and each rule
+    with greedy assignment, all at today's thresholds.
+    """
+    policies = [
+        {"name": f"suggested cpr{delta:+d}", "oc_levels": shifted_levels(delta, oc_levels),
+         "assignment": "matching", "creation": "suggested"}
+        for delta in deltas
+    ]
+    policies.append({"name": "fill_counts", "oc_levels": oc_levels, "assignment": "matching", "creation": "fill_counts"})
+    for creation in ("suggested", "fill_counts"):
+        policies.append({"name": f"{creation} greedy", "oc_levels": oc_levels,
+                         "assignment": "greedy", "creation": creation})
+    return policies
@@ -1,38 +1,294 @@
 
 import os
-import requests
 import json
-from api_limiter import APILimiter
+import time
+import asyncio
+import aiohttp
+import metrics
+from config import CONFIG
+from api_limiter import APILimiter, PRIORITY_INTERACTIVE
 
-config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-with open(config_path) as f:
-    CONFIG = json.load(f)
+# Optional when every faction in config.json "guilds" names its own key
+API_KEY = os.environ.get("TORN_API_KEY", "")
+# Optional comma-separated list of extra keys to spread the call budget over
+API_KEYS = [k.strip() for k in os.environ.get("TORN_API_KEYS", API_KEY).split(",") if k.strip()]
+BASE_URL = "https://api.torn.com/v2"
 
-API_KEY = os.environ["TORN_API_KEY"]
+# Seconds before a single Torn request is abandoned
+REQUEST_TIMEOUT = float(CONFIG.get("torn_request_timeout", 10))
+# Upper bound on requests in flight at once (also the connection pool size)
+MAX_CONCURRENCY = int(CONFIG.get("torn_max_concurrency", 8))
+# Seconds an interactive command will wait for a rate limit slot; slash
+# commands have to answer within Discord's 3s window
+INTERACTIVE_WAIT = float(CONFIG.get("torn_interactive_wait", 2.0))
 
-limiter = APILimiter()
+# Seconds each selection stays fresh; a request is as fresh as its
+# shortest-lived selection
+SELECTION_TTL = {
+    "basic": 3600,
+    "members": 60,
+    "crimes": 120,
+    "balance": 30,
+    "profile": 60,
+}
+SELECTION_TTL.update(CONFIG.get("torn_selection_ttl", {}))
+DEFAULT_TTL = 60
+# How long past its TTL an entry may still be served while it revalidates
+MAX_STALE = float(CONFIG.get("torn_max_stale", 600))
 
-def safe_get(url):
-    if limiter.allow():
-        r = requests.get(url)
-        return r.json()
-    else:
-        print("⚠️ API Rate Limit Hit: Skipping call")
-        return {}
+limiter = APILimiter(keys=API_KEYS)
 
-def get_faction_data():
-    url = f"https://api.torn.com/v2/faction/?selections=basic,crimes,members&key={API_KEY}"
-    return safe_get(url)
 
-def get_crimes_data():
-    url =f"https://api.torn.com/v2/faction/?selections=crimes,members&cat=available&key={API_KEY}"
-    return safe_get(url)
+class StaleResponse(dict):
+    """
+    A cached response served past its TTL. fetched_at is when Torn sent it
+    (time.time()), so callers can say how old it is and don't record it as
+    what Torn says now.
+    """
 
-def get_member_status(user_id):
-    url = f"https://api.torn.com/v2/user/{user_id}?selections=profile,crimes&key={API_KEY}"
-    return safe_get(url)
+    def __init__(self, response, fetched_at):
+        super().__init__(response)
+        self.fetched_at = fetched_at
 
-def get_faction_balances():
-    url = f"https://api.torn.com/v2/faction/?selections=balance&key={API_KEY}"
-    return safe_get(url)
-    
+
+def is_stale(response):
+    return isinstance(response, StaleResponse)
+
+
+class ResponseCache:
+    """
+    TTL cache for Torn responses keyed by endpoint and selection set.
+
+    Concurrent misses for the same key share one in-flight fetch. Callers
+    that pass allow_stale get the last good response straight away while
+    a single background fetch refreshes it, and also when that fetch
+    fails, as long as the response is within max_stale of its TTL. Those
+    come back as StaleResponse. Other callers only ever get fresh data or
+    the failed response.
+    """
+
+    def __init__(self, max_stale=MAX_STALE, clock=time.monotonic):
+        self.max_stale = max_stale
+        self.clock = clock
+        self._entries = {}   # key -> (response, fetched_at)
+        self._inflight = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+
+    @staticmethod
+    def make_key(path, params):
+        selections = frozenset(params.get("selections", "").split(","))
+        rest = tuple(sorted((k, str(v)) for k, v in params.items() if k != "selections"))
+        return path, selections, rest
+
+    @staticmethod
+    def ttl_for(key):
+        _, selections, _ = key
+        return min((SELECTION_TTL.get(s, DEFAULT_TTL) for s in selections), default=DEFAULT_TTL)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale": self.stale,
+            "saved_calls": self.hits + self.coalesced + self.stale,
+            "entries": len(self._entries),
+        }
+
+    def save(self, path):
+        """
+        Write the entries still worth serving to path (JSON), so a restart
+        can pick them up with restore(). Returns how many were written.
+        """
+        now, wall = self.clock(), time.time()
+        entries = []
+        for key, (response, fetched_at) in list(self._entries.items()):
+            age = now - fetched_at
+            if age < self.ttl_for(key) + self.max_stale:
+                path_, selections, rest = key
+                entries.append({
+                    "path": path_,
+                    "selections": sorted(selections),
+                    "params": rest,
+                    "fetched_at": wall - age,
+                    "response": response,
+                })
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entries, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return len(entries)
+
+    def restore(self, path):
+        """
+        Load entries written by save(). They keep their age, so an entry
+        past its TTL is only served stale while it revalidates. Returns
+        how many were loaded.
+        """
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not restore Torn cache from {path}: {e}")
+            return 0
+        now, wall = self.clock(), time.time()
+        loaded = 0
+        for entry in entries:
+            key = (entry["path"], frozenset(entry["selections"]), tuple(tuple(p) for p in entry["params"]))
+            age = wall - entry["fetched_at"]
+            if key not in self._entries and age < self.ttl_for(key) + self.max_stale:
+                self._entries[key] = (entry["response"], now - age)
+                loaded += 1
+        return loaded
+
+    async def get(self, key, fetch, allow_stale=False):
+        entry = self._entries.get(key)
+        if entry is not None:
+            response, fetched_at = entry
+            age = self.clock() - fetched_at
+            ttl = self.ttl_for(key)
+            if age < ttl:
+                self.hits += 1
+                return response
+            if allow_stale and age < ttl + self.max_stale:
+                self.stale += 1
+                self._start(key, fetch)
+                return self._stale(entry)
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        # Shielded so one caller giving up doesn't cancel the shared fetch
+        response = await asyncio.shield(self._start(key, fetch))
+        if response and "error" not in response:
+            return response
+
+        # Failed or rate limited: the last good response, if the caller accepts
+        # stale data and it isn't older than max_stale past its TTL
+        entry = self._entries.get(key)
+        if allow_stale and entry is not None and self.clock() - entry[1] < self.ttl_for(key) + self.max_stale:
+            self.stale += 1
+            return self._stale(entry)
+        return response
+
+    def _stale(self, entry):
+        response, fetched_at = entry
+        return StaleResponse(response, time.time() - (self.clock() - fetched_at))
+
+    def _start(self, key, fetch):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch))
+            self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key, fetch):
+        try:
+            response = await fetch()
+        finally:
+            self._inflight.pop(key, None)
+
+        if response and "error" not in response:
+            self._entries[key] = (response, self.clock())
+        return response
+
+
+class TornClient:
+    """
+    Async Torn API client. All requests share one keep-alive connection
+    pool, are bounded by a semaphore and time out instead of hanging.
+    """
+
+    def __init__(self, limiter, cache=None, base_url=BASE_URL,
+                 timeout=REQUEST_TIMEOUT, max_concurrency=MAX_CONCURRENCY, name="default"):
+        self.limiter = limiter
+        self.name = name
+        self.cache = cache if cache is not None else ResponseCache()
+        self.base_url = base_url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    def _get_session(self):
+        # Created lazily so the session binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def safe_get(self, path, priority=PRIORITY_INTERACTIVE, **params):
+        # Background polling waits as long as it takes, commands only briefly
+        wait = INTERACTIVE_WAIT if priority == PRIORITY_INTERACTIVE else None
+        with metrics.LIMITER_WAIT_SECONDS.time(faction=self.name):
+            acquired = await self.limiter.acquire(priority, timeout=wait)
+        if not acquired:
+            metrics.LIMITER_REJECTIONS.inc(faction=self.name)
+            print(f"⚠️ API Rate Limit Hit: gave up on {path} after {wait}s")
+            return {}
+
+        params["key"] = self.limiter.next_key()
+        session = self._get_session()
+        selections = params.get("selections", "")
+        async with self._semaphore:
+            with metrics.TORN_REQUEST_SECONDS.time(faction=self.name, selections=selections) as labels:
+                try:
+                    async with session.get(f"{self.base_url}{path}", params=params) as r:
+                        response = await r.json(content_type=None)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    labels["result"] = type(e).__name__
+                    print(f"⚠️ Torn API request to {path} failed: {e!r}")
+                    return {}
+                # Torn reports its own errors (bad key, rate limit) with HTTP 200
+                labels["result"] = "error" if isinstance(response, dict) and "error" in response else "ok"
+                return response
+
+    async def cached_get(self, path, priority=PRIORITY_INTERACTIVE, allow_stale=False, **params):
+        key = self.cache.make_key(path, params)
+        return await self.cache.get(key, lambda: self.safe_get(path, priority, **params), allow_stale)
+
+    async def get_faction_data(self, priority=PRIORITY_INTERACTIVE, allow_stale=False):
+        return await self.cached_get("/faction/", priority, allow_stale, selections="basic,crimes,members")
+
+    async def get_crimes_data(self, priority=PRIORITY_INTERACTIVE, allow_stale=False):
+        return await self.cached_get("/faction/", priority, allow_stale, selections="crimes,members", cat="available")
+
+    async def get_member_status(self, user_id, priority=PRIORITY_INTERACTIVE, allow_stale=False):
+        return await self.cached_get(f"/user/{user_id}", priority, allow_stale, selections="profile,crimes")
+
+    async def get_faction_balances(self, priority=PRIORITY_INTERACTIVE, allow_stale=False):
+        return await self.cached_get("/faction/", priority, allow_stale, selections="balance")
+
+
+client = TornClient(limiter)
+
+async def safe_get(path, priority=PRIORITY_INTERACTIVE, **params):
+    return await client.safe_get(path, priority, **params)
+
+async def get_faction_data(priority=PRIORITY_INTERACTIVE, allow_stale=False):
+    return await client.get_faction_data(priority, allow_stale)
+
+async def get_crimes_data(priority=PRIORITY_INTERACTIVE, allow_stale=False):
+    return await client.get_crimes_data(priority, allow_stale)
+
+async def get_member_status(user_id, priority=PRIORITY_INTERACTIVE, allow_stale=False):
+    return await client.get_member_status(user_id, priority, allow_stale)
+
+async def get_faction_balances(priority=PRIORITY_INTERACTIVE, allow_stale=False):
+    return await client.get_faction_balances(priority, allow_stale)
+
+def cache_stats():
+    return client.cache.stats()
+
+async def close():
+    await client.close()